@@ -1,12 +1,20 @@
+import time
+
 import numpy as np
 
+from utils.cost import HaversineCost
 from utils.geo import haversine_distance
 from .pheromone import PheromoneMatrix
 from .ant import Ant
+from .colony import ColonyController
 from .fitness import total_fitness
+from .load_ledger import LoadLedger
 
 def run_aco(cities, servers, alpha=1.0, beta=1.0, gamma=0.5, iterations=50, num_ants=10, 
-            evaporation=0.1, q0=0.1, min_pheromone=0.1, max_pheromone=10.0):
+            evaporation=0.1, q0=0.1, min_pheromone=0.1, max_pheromone=10.0,
+            time_budget=None, initial_assignment=None, pheromones=None, distances=None,
+            cost_source=None, adaptive=False, min_ants=None, tolerance=1e-4, patience=20,
+            max_restarts=1, manage_servers=True, verbose=True):
     """
     Run ACO optimization for CDN server assignment with dynamic server management
     
@@ -22,66 +30,127 @@ def run_aco(cities, servers, alpha=1.0, beta=1.0, gamma=0.5, iterations=50, num_
         q0: Exploration/exploitation parameter
         min_pheromone: Minimum pheromone value
         max_pheromone: Maximum pheromone value
+        time_budget: Wall-clock seconds; checked before every ant, so the run
+                     returns the incumbent as soon as the budget is spent (at least
+                     one ant runs when there is no incumbent), and no iteration is
+                     started that would not finish within it (judged by the
+                     previous iteration's duration)
+        initial_assignment: Incumbent assignment to start from (warm start)
+        pheromones: Existing PheromoneMatrix to continue from (warm start)
+        distances: Precomputed (num_cities, num_servers) cost matrix; built once
+                   up front from `cost_source` when omitted
+        cost_source: utils.cost.CostSource used by both the ants and the fitness
+                     (haversine km by default)
+        adaptive: Adapt the colony size to its diversity and stop early once
+                  improvement stalls (see aco.colony.ColonyController)
+        min_ants: Smallest colony size in adaptive mode
+        tolerance: Relative best-cost improvement below which the search is stalled
+        patience: Iterations the improvement is measured over
+        max_restarts: Pheromone resets allowed on stalls before stopping
+        manage_servers: Switch servers on/off from the best assignment's load
+                        (see `update_server_states`); turn off for sub-problems
+                        whose servers also carry load the colony does not see
+        verbose: Print per-iteration progress
         
     Returns:
         best_assignment: Best found city-server assignment
         last_iteration_ant_paths: Paths from last iteration for visualization
         convergence_data: Fitness values over iterations for analysis
+        pheromones: Final PheromoneMatrix, reusable as a warm start
+        iterations_run: Number of iterations actually completed
+        stop_reason: Why the run ended
+        colony_history: Per-iteration colony size and diversity (adaptive mode)
     """
-    pheromones = PheromoneMatrix(len(cities), len(servers), 
-                 min_val=min_pheromone, max_val=max_pheromone)
+    start_time = time.perf_counter()
+    if distances is None:
+        distances = (cost_source or HaversineCost()).matrix(cities, servers)
+    if pheromones is None:
+        pheromones = PheromoneMatrix(len(cities), len(servers), 
+                     min_val=min_pheromone, max_val=max_pheromone)
     best_assignment = None
     best_assignment_each_iteration = []
     best_cost = float('inf')
+    best_ledger = None
+
+    if initial_assignment is not None:
+        best_assignment = list(initial_assignment)
+        best_cost = total_fitness(best_assignment, cities, servers, alpha, beta, gamma, distances)
+        best_ledger = LoadLedger(cities, servers, best_assignment)
     convergence_data = []
     
     # Track server states over iterations
     server_utilization_history = []
     active_servers_history = []
 
+    controller = ColonyController(num_ants, min_ants, tolerance, patience, max_restarts) if adaptive else None
+    stop_reason = f"iteration limit ({iterations})"
+    out_of_time = False
+
     for iteration in range(iterations):
+        iteration_start = time.perf_counter()
+        if controller is not None:
+            num_ants = controller.num_ants
         ants = [Ant(len(cities), len(servers)) for _ in range(num_ants)]
         iteration_costs = []
         
         # Construct solutions
         for ant in ants:
+            if (time_budget is not None and best_assignment is not None
+                    and time.perf_counter() - start_time > time_budget):
+                out_of_time = True
+                break
+
             # Dynamic q0 - more exploration early, more exploitation later
             current_q0 = q0 * (iteration / iterations)
             ant.construct_solution(pheromones, cities, servers, 
-                                 alpha, beta, gamma, q0=current_q0)
+                                 alpha, beta, gamma, q0=current_q0, distances=distances)
             
             # Calculate fitness with dynamic weights
-            cost = total_fitness(ant.assignment, cities, servers, alpha, beta, gamma)
+            cost = total_fitness(ant.assignment, cities, servers, alpha, beta, gamma, distances)
             iteration_costs.append(cost)
             
             # Update best solution
             if cost < best_cost:
                 best_cost = cost
                 best_assignment = ant.assignment.copy()
+                if best_ledger is None:
+                    best_ledger = LoadLedger(cities, servers, best_assignment)
+                else:
+                    best_ledger.sync_status(servers)
+                    best_ledger.reassign(best_assignment)
                 
                 # Dynamic server management based on best solution
-                update_server_states(best_assignment, cities, servers)
+                if manage_servers:
+                    update_server_states(best_assignment, cities, servers, best_ledger)
+
+        if out_of_time:
+            stop_reason = f"time budget ({time_budget}s)"
+            ants = ants[:len(iteration_costs)]
+            if not iteration_costs:
+                break
 
         best_assignment_each_iteration.append(best_cost)
-        print(f"[INFO] Iteration {iteration+1}/{iterations}, Ant Cost: {cost:.2f}, Best Cost: {best_cost:.2f}")
+        if verbose:
+            print(f"[INFO] Iteration {iteration+1}/{iterations}, Ant Cost: {cost:.2f}, Best Cost: {best_cost:.2f}")
 
         # Track convergence and server utilization
         avg_cost = np.mean(iteration_costs)
         convergence_data.append(avg_cost)
         
         # Record server utilization metrics
-        util, active = calculate_utilization_metrics(best_assignment, cities, servers)
+        best_ledger.sync_status(servers)
+        util, active = calculate_utilization_metrics(best_assignment, cities, servers, best_ledger)
         server_utilization_history.append(util)
         active_servers_history.append(active)
 
         # Pheromone update
         pheromones.evaporate(evaporation)
         
-        # Only reinforce top-performing solutions
-        elite_ants = sorted(ants, key=lambda a: total_fitness(a.assignment, cities, servers, alpha, beta, gamma))[:int(num_ants*0.3)]
+        # Only reinforce top-performing solutions (reusing the costs computed above)
+        elite = sorted(zip(iteration_costs, range(len(ants))))[:max(1, int(num_ants*0.3))]
         
-        for ant in elite_ants:
-            cost = total_fitness(ant.assignment, cities, servers, alpha, beta, gamma)
+        for cost, ant_idx in elite:
+            ant = ants[ant_idx]
             pheromone_deposit = 1.0 / (1 + cost)  # Normalized deposit
             
             for city_idx, server_idx in enumerate(ant.assignment):
@@ -90,11 +159,32 @@ def run_aco(cities, servers, alpha=1.0, beta=1.0, gamma=0.5, iterations=50, num_
         # Apply pheromone bounds
         pheromones.enforce_bounds()
 
+        if controller is not None:
+            action = controller.update(iteration, pheromones, [ant.assignment for ant in ants],
+                                       best_assignment_each_iteration)
+            if action == 'stop':
+                stop_reason = controller.stop_reason
+                break
+            if action == 'restart':
+                pheromones.reset()
+                if verbose:
+                    print(f"[INFO] Search stalled, resetting pheromones (restart {controller.restarts})")
+
+        if out_of_time:
+            break
+        if time_budget is not None:
+            now = time.perf_counter()
+            if now - start_time + (now - iteration_start) > time_budget:
+                stop_reason = f"time budget ({time_budget}s)"
+                break
+
     # Get paths from last iteration
     last_iteration_ant_paths = [ant.assignment for ant in ants]
     
     # Final server state update
-    update_server_states(best_assignment, cities, servers)
+    best_ledger.sync_status(servers)
+    if manage_servers:
+        update_server_states(best_assignment, cities, servers, best_ledger)
     
     return {
         'best_assignment': best_assignment,
@@ -103,16 +193,17 @@ def run_aco(cities, servers, alpha=1.0, beta=1.0, gamma=0.5, iterations=50, num_
         'server_utilization': server_utilization_history,
         'active_servers': active_servers_history,
         'best_cost': best_cost,
-        'best_assignment_each_iteration': best_assignment_each_iteration
+        'best_assignment_each_iteration': best_assignment_each_iteration,
+        'pheromones': pheromones,
+        'iterations_run': len(best_assignment_each_iteration),
+        'stop_reason': stop_reason,
+        'colony_history': controller.history if controller is not None else []
     }
 
-def update_server_states(assignment, cities, servers):
+def update_server_states(assignment, cities, servers, ledger=None):
     """Dynamically turn servers on/off based on assignment"""
-    server_loads = [0] * len(servers)
-    
-    # Calculate server loads
-    for city_idx, server_idx in enumerate(assignment):
-        server_loads[server_idx] += cities[city_idx]['UsagePerHour']
+    if ledger is None:
+        ledger = LoadLedger(cities, servers, assignment)
     
     # Update server states
     for server_idx, server in enumerate(servers):
@@ -122,11 +213,13 @@ def update_server_states(assignment, cities, servers):
             if nearby_demand > server['Capacity'] * 0.3:  # 30% threshold
                 server['Status'] = 'Running'
                 server['CPU_Health'] = 10  # Initial low CPU
+                ledger.set_status(server_idx, 'Running')
         else:
             # Turn off if underutilized
-            if server_loads[server_idx] < server['Capacity'] * 0.1:  # 10% threshold
+            if ledger.load(server_idx) < server['Capacity'] * 0.1:  # 10% threshold
                 server['Status'] = 'Down'
                 server['CPU_Health'] = 0
+                ledger.set_status(server_idx, 'Down')
 
 def calculate_nearby_demand(server, cities, assignment, radius_km=1000):
     """Calculate total demand from cities within radius of server"""
@@ -141,8 +234,11 @@ def calculate_nearby_demand(server, cities, assignment, radius_km=1000):
                 total_demand += city['UsagePerHour']
     return total_demand
 
-def calculate_utilization_metrics(assignment, cities, servers):
+def calculate_utilization_metrics(assignment, cities, servers, ledger=None):
     """Calculate server utilization metrics"""
+    if ledger is not None:
+        return ledger.avg_utilization(), ledger.active_servers()
+
     server_loads = [0] * len(servers)
     for city_idx, server_idx in enumerate(assignment):
         if server_idx != -1:  # Skip unassigned
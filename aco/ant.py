@@ -10,7 +10,7 @@ class Ant:
         self.server_loads = [0 for _ in range(num_servers)]  # Track current server loads
         self.activated_servers = []  # Track which servers were activated
 
-    def construct_solution(self, pheromones, cities, servers, alpha, beta, gamma, q0=1):
+    def construct_solution(self, pheromones, cities, servers, alpha, beta, gamma, q0=1, distances=None):
         """
         Construct solution with dynamic CPU health consideration
 
@@ -22,6 +22,7 @@ class Ant:
             beta: Weight for CPU health objective
             gamma: Weight for server utilization objective (currently unused, reserved for future use)
             q0: Greediness parameter (probability to choose best option)
+            distances: Optional precomputed (num_cities, num_servers) distance matrix
         """
         self.server_loads = [0 for _ in range(self.num_servers)]
         self.assignment = [-1 for _ in range(self.num_cities)]
@@ -29,6 +30,7 @@ class Ant:
 
         for city_idx in range(self.num_cities):
             city = cities[city_idx]
+            city_distances = distances[city_idx] if distances is not None else None
             possible_servers = []
 
             for server_idx in range(self.num_servers):
@@ -39,10 +41,13 @@ class Ant:
                     continue
 
                 # Distance calculation
-                distance = haversine_distance(
-                    city['lat'], city['long'],
-                    server['lat'], server['long']
-                )
+                if city_distances is not None:
+                    distance = city_distances[server_idx]
+                else:
+                    distance = haversine_distance(
+                        city['lat'], city['long'],
+                        server['lat'], server['long']
+                    )
 
                 # Projected server load
                 current_load = self.server_loads[server_idx] + city['UsagePerHour']
@@ -111,7 +116,7 @@ class Ant:
         else:
             raise RuntimeError("No server available to activate")
 
-    def evaluate_fitness(self, cities, servers, alpha=1.0, beta=1.0):
+    def evaluate_fitness(self, cities, servers, alpha=1.0, beta=1.0, distances=None):
         """
         Compute a fitness score for the solution. Lower is better.
         Combines total distance and CPU penalties.
@@ -123,10 +128,13 @@ class Ant:
             city = cities[city_idx]
             server = servers[server_idx]
 
-            distance = haversine_distance(
-                city['lat'], city['long'],
-                server['lat'], server['long']
-            )
+            if distances is not None:
+                distance = distances[city_idx, server_idx]
+            else:
+                distance = haversine_distance(
+                    city['lat'], city['long'],
+                    server['lat'], server['long']
+                )
             total_distance += distance
 
             load = self.server_loads[server_idx]
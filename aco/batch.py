@@ -0,0 +1,163 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.cost import HaversineCost
+
+def _solve_scenarios(usage, distances, capacity, cpu_health, threshold, running,
+                     alpha, beta, gamma, iterations, num_ants, evaporation, q0,
+                     min_pheromone, max_pheromone, seed):
+    """
+    Vectorized colony over a block of scenarios; arrays are indexed
+    [scenario, ant, ...] and every scenario has its own pheromone matrix.
+    """
+    rng = np.random.default_rng(seed)
+    num_scenarios, num_cities = usage.shape
+    num_servers = distances.shape[1]
+    num_running = int(running.sum())
+
+    pheromones = np.ones((num_scenarios, num_cities, num_servers), dtype=np.float32)
+    inverse_distance = 1 / (distances + 1e-6)
+    best_costs = np.full(num_scenarios, np.inf)
+    best_assignments = np.full((num_scenarios, num_cities), -1, dtype=np.int64)
+    convergence = []
+
+    scenario_idx = np.arange(num_scenarios)[:, None]
+    ant_idx = np.arange(num_ants)[None, :]
+    num_elite = max(1, int(num_ants * 0.3))
+
+    for iteration in range(iterations):
+        current_q0 = q0 * (iteration / iterations)
+        loads = np.zeros((num_scenarios, num_ants, num_servers))
+        assignments = np.empty((num_scenarios, num_ants, num_cities), dtype=np.int64)
+        costs = np.zeros((num_scenarios, num_ants))
+
+        for city_idx in range(num_cities):
+            city_usage = usage[:, city_idx][:, None, None]
+
+            # Attractiveness with projected CPU stress, as in Ant.construct_solution
+            stress = cpu_health + (loads + city_usage) / capacity * 100
+            cpu_penalty = np.maximum(0, stress - threshold) * beta
+            attractiveness = (
+                (pheromones[:, None, city_idx, :] ** alpha) *
+                inverse_distance[city_idx] /
+                (1 + cpu_penalty)
+            )
+            attractiveness[..., ~running] = 0
+
+            # Greedy or roulette-wheel choice per (scenario, ant)
+            cumulative = np.cumsum(attractiveness, axis=-1)
+            draw = (1 - rng.random((num_scenarios, num_ants, 1))) * cumulative[..., -1:]
+            sampled = np.minimum((cumulative < draw).sum(axis=-1), num_servers - 1)
+            greedy = attractiveness.argmax(axis=-1)
+            choice = np.where(rng.random((num_scenarios, num_ants)) < current_q0, greedy, sampled)
+
+            assignments[..., city_idx] = choice
+            loads[scenario_idx, ant_idx, choice] += city_usage[..., 0]
+
+            # Running cost terms, as in total_fitness
+            distance = distances[city_idx, choice]
+            server_load = loads[scenario_idx, ant_idx, choice]
+            projected_cpu = cpu_health[choice] + server_load / capacity[choice] * 100
+            penalty = np.maximum(0, projected_cpu - threshold[choice])
+            costs += np.where(distance != 0, alpha * distance + beta * penalty, 0)
+
+        # Load imbalance among running servers and activation cost
+        running_loads = loads[..., running]
+        costs += gamma * ((running_loads - running_loads.mean(axis=-1, keepdims=True)) ** 2).sum(axis=-1)
+        costs += 0.01 * num_running
+
+        # Best solution per scenario
+        iteration_best = costs.argmin(axis=1)
+        iteration_best_cost = costs[np.arange(num_scenarios), iteration_best]
+        improved = iteration_best_cost < best_costs
+        best_costs[improved] = iteration_best_cost[improved]
+        best_assignments[improved] = assignments[improved, iteration_best[improved]]
+        convergence.append(best_costs.copy())
+
+        # Evaporate, then reinforce the elite ants of every scenario
+        pheromones = np.clip(pheromones * (1 - evaporation), min_pheromone, max_pheromone)
+        if num_elite:
+            elite = np.argsort(costs, axis=1)[:, :num_elite]
+            elite_assignments = np.take_along_axis(assignments, elite[..., None], axis=1)
+            deposit = (1.0 / (1 + np.take_along_axis(costs, elite, axis=1))).astype(np.float32)
+            np.add.at(
+                pheromones,
+                (scenario_idx[..., None], np.arange(num_cities), elite_assignments),
+                np.broadcast_to(deposit[..., None], elite_assignments.shape)
+            )
+            pheromones = np.clip(pheromones, min_pheromone, max_pheromone)
+
+    return best_assignments, best_costs, np.array(convergence)
+
+def run_aco_batch(cities, servers, usage, alpha=1.0, beta=1.0, gamma=0.5, iterations=50,
+                  num_ants=10, evaporation=0.1, q0=0.1, min_pheromone=0.1, max_pheromone=10.0,
+                  distances=None, cost_source=None, processes=None, chunk_size=None, seed=None):
+    """
+    Solve many demand scenarios over the same cities and servers at once.
+
+    Each scenario gets its own colony and pheromone matrix, but the colonies
+    are advanced together as arrays over the scenario axis, and the distance
+    matrix is shared. Server statuses are taken as given: the dynamic server
+    on/off management of `run_aco` is not applied in batch mode.
+
+    Args:
+        cities: List of typed city dictionaries (only 'lat'/'long' are used)
+        servers: List of typed server dictionaries
+        usage: (num_scenarios, num_cities) array of 'UsagePerHour' values
+        alpha, beta, gamma, iterations, num_ants, evaporation, q0,
+        min_pheromone, max_pheromone: As in `run_aco`
+        distances: Precomputed (num_cities, num_servers) cost matrix
+        cost_source: utils.cost.CostSource for the cost matrix (haversine km by
+                     default); batch mode materializes it densely
+        processes: Number of worker processes (None or 1 solves in-process)
+        chunk_size: Scenarios per worker task (defaults to an even split)
+        seed: Seed for the random choices
+
+    Returns:
+        best_assignments: (num_scenarios, num_cities) array of server indices
+        best_costs: (num_scenarios,) array of fitness values
+        convergence: (iterations, num_scenarios) best cost per iteration
+    """
+    usage = np.asarray(usage, dtype=np.float64)
+    if usage.ndim != 2 or usage.shape[1] != len(cities):
+        raise ValueError(f"usage must have shape (scenarios, {len(cities)}), got {usage.shape}")
+
+    running = np.array([s['Status'] == 'Running' for s in servers], dtype=bool)
+    if not running.any():
+        raise ValueError("Batch mode needs at least one running server")
+
+    if distances is None:
+        distances = (cost_source or HaversineCost()).matrix(cities, servers)
+    shared = (
+        np.asarray(distances, dtype=np.float64),
+        np.array([s['Capacity'] for s in servers], dtype=np.float64),
+        np.array([s['CPU_Health'] for s in servers], dtype=np.float64),
+        np.array([s['Threshold'] for s in servers], dtype=np.float64),
+        running,
+        alpha, beta, gamma, iterations, num_ants, evaporation, q0, min_pheromone, max_pheromone,
+    )
+
+    num_scenarios = usage.shape[0]
+    if not processes or processes == 1:
+        best_assignments, best_costs, convergence = _solve_scenarios(usage, *shared, seed)
+    else:
+        chunk_size = chunk_size or -(-num_scenarios // processes)
+        starts = range(0, num_scenarios, chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(starts))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            chunks = list(pool.map(
+                _solve_scenarios,
+                [usage[start:start + chunk_size] for start in starts],
+                *([value] * len(starts) for value in shared),
+                seeds
+            ))
+        best_assignments = np.concatenate([chunk[0] for chunk in chunks])
+        best_costs = np.concatenate([chunk[1] for chunk in chunks])
+        convergence = np.concatenate([chunk[2] for chunk in chunks], axis=1)
+
+    return {
+        'best_assignments': best_assignments,
+        'best_costs': best_costs,
+        'convergence': convergence,
+    }
@@ -0,0 +1,145 @@
+import math
+
+import numpy as np
+
+def pheromone_entropy(matrix):
+    """
+    Mean normalized Shannon entropy of the per-city pheromone rows.
+
+    1.0 means every server is equally likely for every city; values near 0
+    mean each city's row has collapsed onto a single server.
+    """
+    num_servers = matrix.shape[1]
+    if num_servers < 2:
+        return 0.0
+    probabilities = matrix / matrix.sum(axis=1, keepdims=True)
+    entropy = -(probabilities * np.log(np.clip(probabilities, 1e-12, None))).sum(axis=1)
+    return float(entropy.mean() / math.log(num_servers))
+
+def duplicate_rate(assignments, num_servers):
+    """
+    Share of ants that pick each city's most common server, averaged over cities.
+
+    1.0 means all ants built the same assignment; 1 / num_ants means no two
+    ants agreed on any city.
+    """
+    if not assignments:
+        return 0.0
+    assignments = np.asarray(assignments)
+    num_ants, num_cities = assignments.shape
+    counts = np.zeros((num_cities, num_servers), dtype=np.int64)
+    np.add.at(counts, (np.broadcast_to(np.arange(num_cities), assignments.shape), assignments), 1)
+    return float(counts.max(axis=1).mean() / num_ants)
+
+# Smallest colony whose top 30% (the ants that deposit pheromone) is non-empty
+MIN_ELITE_COLONY = 4
+
+class ColonyController:
+    def __init__(self, num_ants, min_ants=None, tolerance=1e-4, patience=20, max_restarts=1,
+                 shrink_factor=0.75, duplicate_threshold=0.8, entropy_threshold=0.2, stale_iterations=None):
+        """
+        Adapts the colony size to its diversity and decides when to stop.
+
+        Each iteration it records pheromone row entropy, the per-city
+        duplicate-assignment rate and the relative best-cost improvement over
+        the last `patience` iterations. The colony shrinks while ants mostly
+        repeat each other, the pheromones have collapsed, or the best cost has
+        not improved for `stale_iterations`. When improvement stalls below `tolerance` the
+        pheromones are reset and the colony grows back to its full size, up to
+        `max_restarts` times; after that the run stops.
+
+        Args:
+            num_ants (int): Full colony size, used at the start and after a restart.
+            min_ants (int, optional): Smallest colony size (defaults to num_ants // 4, but
+                                      at least MIN_ELITE_COLONY so the top 30% that
+                                      deposit pheromone is never empty).
+            tolerance (float): Relative improvement below which the search is stalled.
+            patience (int): Iterations the improvement is measured over.
+            max_restarts (int): Pheromone resets allowed before stopping.
+            shrink_factor (float): Colony size multiplier when diversity is low.
+            duplicate_threshold (float): Per-city agreement at which the colony shrinks.
+            entropy_threshold (float): Pheromone entropy at which the colony shrinks.
+            stale_iterations (int, optional): Iterations without a new best after which
+                                              the colony shrinks (defaults to patience // 2).
+        """
+        self.max_ants = num_ants
+        if min_ants is None:
+            min_ants = max(MIN_ELITE_COLONY, num_ants // 4)
+        self.min_ants = max(1, min(min_ants, num_ants))
+        self.num_ants = num_ants
+        self.tolerance = tolerance
+        self.patience = patience
+        self.max_restarts = max_restarts
+        self.shrink_factor = shrink_factor
+        self.duplicate_threshold = duplicate_threshold
+        self.entropy_threshold = entropy_threshold
+        self.stale_iterations = stale_iterations if stale_iterations is not None else max(1, patience // 2)
+
+        self.restarts = 0
+        self.phase_start = 0  # Iteration at which the current restart phase began
+        self.history = []
+        self.stop_reason = None
+
+    def improvement(self, best_costs):
+        """Relative best-cost improvement over the last `patience` iterations of this phase."""
+        if len(best_costs) - self.phase_start <= self.patience:
+            return None
+        previous, current = best_costs[-self.patience - 1], best_costs[-1]
+        if not math.isfinite(previous) or previous == 0:
+            return None
+        return (previous - current) / abs(previous)
+
+    def iterations_since_improvement(self, best_costs):
+        """Number of trailing iterations of this phase without a new best cost."""
+        count = 0
+        for i in range(len(best_costs) - 1, self.phase_start, -1):
+            if best_costs[i] < best_costs[i - 1]:
+                break
+            count += 1
+        return count
+
+    def update(self, iteration, pheromones, assignments, best_costs):
+        """
+        Records this iteration's diversity and returns the next action.
+
+        Args:
+            iteration: Index of the iteration just finished
+            pheromones: PheromoneMatrix after this iteration's update
+            assignments: Assignments built by this iteration's ants
+            best_costs: Best cost after every iteration so far
+
+        Returns:
+            'stop', 'restart' or None
+        """
+        entropy = pheromone_entropy(pheromones.matrix)
+        duplicates = duplicate_rate(assignments, pheromones.matrix.shape[1])
+        improvement = self.improvement(best_costs)
+        record = {
+            'iteration': iteration,
+            'num_ants': self.num_ants,
+            'entropy': entropy,
+            'duplicate_rate': duplicates,
+            'improvement': improvement,
+            'event': None,
+        }
+        self.history.append(record)
+
+        if improvement is not None and improvement < self.tolerance:
+            if self.restarts < self.max_restarts:
+                self.restarts += 1
+                self.phase_start = len(best_costs)
+                self.num_ants = self.max_ants
+                record['event'] = 'restart'
+                return 'restart'
+            self.stop_reason = (f"stalled: relative improvement {improvement:.2e} < {self.tolerance:g} "
+                                f"over {self.patience} iterations after {self.restarts} restart(s)")
+            record['event'] = 'stop'
+            return 'stop'
+
+        stale = self.iterations_since_improvement(best_costs) >= self.stale_iterations
+        if duplicates >= self.duplicate_threshold or entropy <= self.entropy_threshold or stale:
+            shrunk = max(self.min_ants, int(self.num_ants * self.shrink_factor))
+            if shrunk < self.num_ants:
+                self.num_ants = shrunk
+                record['event'] = 'shrink'
+        return None
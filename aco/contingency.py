@@ -0,0 +1,215 @@
+import copy
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.cost import HaversineCost
+from .aco_runner import run_aco
+from .fitness import total_fitness
+from .load_ledger import LoadLedger
+from .pheromone import PheromoneMatrix
+
+_shared = {}
+
+def _init_worker(shared):
+    """Stores the instance and baseline once per worker process."""
+    _shared.update(shared)
+
+def affected_cities(outage, cities, servers, assignment, distances, spill_neighbours=3):
+    """
+    Returns the cities that must be re-solved for an outage.
+
+    These are the cities assigned to a failed server, plus every city on a
+    surviving server that would be pushed over its CPU threshold if the
+    displaced cities all moved to their nearest surviving servers (spillover).
+
+    Args:
+        outage: Tuple of failed server indices
+        cities, servers: Typed instance
+        assignment: Baseline assignment
+        distances: (num_cities, num_servers) cost matrix
+        spill_neighbours: Surviving servers considered as receivers per displaced city
+
+    Returns:
+        Sorted list of city indices
+    """
+    failed = set(outage)
+    ledger = LoadLedger(cities, servers, assignment)
+    displaced = [c for c, s in enumerate(assignment) if s in failed]
+    survivors = np.array([s for s in range(len(servers))
+                          if s not in failed and servers[s]['Status'] == 'Running'])
+    if len(survivors) == 0:
+        return list(range(len(cities)))
+
+    # Spread each displaced city's demand over its nearest surviving servers
+    extra = np.zeros(len(servers))
+    k = min(spill_neighbours, len(survivors))
+    for city_idx in displaced:
+        row = np.asarray(distances[city_idx])[survivors]
+        receivers = survivors[np.argsort(row)[:k]]
+        extra[receivers] += cities[city_idx]['UsagePerHour'] / k
+
+    spilled = set()
+    for server_idx in np.flatnonzero(extra):
+        server = servers[server_idx]
+        stress = server['CPU_Health'] + (ledger.load(server_idx) + extra[server_idx]) / server['Capacity'] * 100
+        if stress > server['Threshold']:
+            spilled.add(int(server_idx))
+
+    return sorted(set(displaced) | {c for c, s in enumerate(assignment) if s in spilled})
+
+def solve_outage(outage, cities, servers, assignment, pheromone_matrix, distances,
+                 spill_neighbours=3, seed=None, **aco_params):
+    """
+    Re-solves only the cities affected by an outage, warm-started from the
+    baseline pheromones, with every other city kept on its baseline server.
+
+    The load of the fixed cities is folded into each surviving server's
+    CPU_Health, so the sub-colony sees the real remaining headroom.
+
+    Returns:
+        Dict with the merged assignment, the re-solved city count and the
+        server list used for evaluation (failed servers 'Down')
+    """
+    failed = set(outage)
+    resolve = affected_cities(outage, cities, servers, assignment, distances, spill_neighbours)
+    resolve_set = set(resolve)
+    survivors = [s for s in range(len(servers)) if s not in failed]
+
+    fixed_loads = np.zeros(len(servers))
+    for city_idx, server_idx in enumerate(assignment):
+        if city_idx not in resolve_set:
+            fixed_loads[server_idx] += cities[city_idx]['UsagePerHour']
+
+    sub_servers = []
+    for server_idx in survivors:
+        server = copy.deepcopy(servers[server_idx])
+        server['CPU_Health'] += fixed_loads[server_idx] / server['Capacity'] * 100
+        sub_servers.append(server)
+
+    merged = list(assignment)
+    evaluation_servers = copy.deepcopy(servers)
+    for server_idx in failed:
+        evaluation_servers[server_idx]['Status'] = 'Down'
+
+    if resolve:
+        sub_cities = [cities[c] for c in resolve]
+        pheromones = PheromoneMatrix(len(resolve), len(survivors),
+                                     min_val=aco_params.get('min_pheromone', 0.1),
+                                     max_val=aco_params.get('max_pheromone', 10.0))
+        pheromones.matrix = pheromone_matrix[np.ix_(resolve, survivors)].astype(np.float32)
+        sub_distances = np.vstack([np.asarray(distances[c])[survivors] for c in resolve])
+
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        # Survivors also carry the fixed cities' load (folded into CPU_Health),
+        # which the sub-colony's own server on/off rule would ignore
+        result = run_aco(sub_cities, sub_servers, pheromones=pheromones, distances=sub_distances,
+                         verbose=False, **dict(aco_params, manage_servers=False))
+
+        for local_city, local_server in enumerate(result['best_assignment']):
+            merged[resolve[local_city]] = survivors[local_server]
+        for local_server, server in enumerate(sub_servers):
+            # Keep servers the sub-colony had to activate
+            if server['Status'] == 'Running':
+                evaluation_servers[survivors[local_server]]['Status'] = 'Running'
+
+    return {
+        'assignment': merged,
+        'resolved_cities': len(resolve),
+        'servers': evaluation_servers,
+    }
+
+def _run_scenario(outage, seed):
+    s = _shared
+    solution = solve_outage(outage, s['cities'], s['servers'], s['assignment'], s['pheromones'],
+                            s['distances'], s['spill_neighbours'], seed, **s['aco_params'])
+    return _score(outage, solution, s)
+
+def _score(outage, solution, s):
+    cities, servers = s['cities'], solution['servers']
+    assignment = solution['assignment']
+    weights = {k: s['aco_params'].get(k, d) for k, d in (('alpha', 1.0), ('beta', 1.0), ('gamma', 0.5))}
+    cost = total_fitness(assignment, cities, servers, distances=s['distances'], **weights)
+
+    ledger = LoadLedger(cities, servers, assignment)
+    stress = [servers[i]['CPU_Health'] + ledger.utilization(i) * 100 for i in range(len(servers))]
+    overloaded = [servers[i].get('CDN_ID', i) for i, value in enumerate(stress)
+                  if value > servers[i]['Threshold'] and ledger.load(i) > 0]
+
+    return {
+        'outage': [s['servers'][i].get('CDN_ID', i) for i in outage],
+        'cost': float(cost),
+        'cost_delta': float(cost - s['baseline_cost']),
+        'resolved_cities': solution['resolved_cities'],
+        'churn': sum(1 for old, new in zip(s['assignment'], assignment) if old != new),
+        'max_utilization': max(ledger.utilization(i) for i in range(len(servers))),
+        'overloaded_servers': overloaded,
+        'assignment': assignment,
+    }
+
+def run_contingency(cities, servers, baseline, outages=None, pairs=False, spill_neighbours=3,
+                    cost_source=None, processes=None, seed=None, **aco_params):
+    """
+    N-1 (and optionally N-2) contingency analysis against a baseline solution.
+
+    For every outage only the affected cities (see `affected_cities`) are
+    re-solved, warm-started from the baseline pheromones; scenarios run in
+    parallel worker processes.
+
+    Args:
+        cities, servers: Typed instance the baseline was solved on
+        baseline: Result dict of `run_aco` ('best_assignment', 'pheromones')
+        outages: List of tuples of server indices (defaults to every running server)
+        pairs: Also include every pair of running servers
+        spill_neighbours: Receivers per displaced city when estimating spillover
+        cost_source: utils.cost.CostSource (haversine km by default)
+        processes: Worker process count (None uses all cores)
+        seed: Seed for the re-solves
+        **aco_params: Passed to `run_aco` (a short run is enough for the sub-problems)
+
+    Returns:
+        List of scenario reports ranked by cost increase, worst first
+    """
+    running = [i for i, s in enumerate(servers) if s['Status'] == 'Running']
+    if outages is None:
+        outages = [(i,) for i in running]
+        if pairs:
+            outages += list(itertools.combinations(running, 2))
+
+    assignment = list(baseline['best_assignment'])
+    distances = (cost_source or HaversineCost()).matrix(cities, servers)
+    weights = {k: aco_params.get(k, d) for k, d in (('alpha', 1.0), ('beta', 1.0), ('gamma', 0.5))}
+    shared = {
+        'cities': cities,
+        'servers': servers,
+        'assignment': assignment,
+        'pheromones': baseline['pheromones'].get_matrix(),
+        'distances': distances,
+        'spill_neighbours': spill_neighbours,
+        'aco_params': aco_params,
+        'baseline_cost': float(total_fitness(assignment, cities, servers, distances=distances, **weights)),
+    }
+
+    seeds = [None if seed is None else seed + i for i in range(len(outages))]
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(shared,)) as pool:
+        reports = list(pool.map(_run_scenario, outages, seeds))
+
+    reports.sort(key=lambda r: r['cost_delta'], reverse=True)
+    for rank, report in enumerate(reports, start=1):
+        report['rank'] = rank
+    return reports
+
+def format_risk_report(reports, limit=None):
+    """Renders contingency reports as a plain-text ranked table."""
+    lines = [f"{'rank':>4}  {'outage':<20} {'cost_delta':>14} {'resolved':>8} {'churn':>6} {'max_util':>8}  overloaded"]
+    for report in reports[:limit]:
+        lines.append(
+            f"{report['rank']:>4}  {','.join(map(str, report['outage'])):<20} "
+            f"{report['cost_delta']:>14.2f} {report['resolved_cities']:>8} {report['churn']:>6} "
+            f"{report['max_utilization']:>8.2f}  {','.join(map(str, report['overloaded_servers'])) or '-'}"
+        )
+    return '\n'.join(lines)
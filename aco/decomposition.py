@@ -0,0 +1,328 @@
+import copy
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.geo import unit_vectors
+from .aco_runner import run_aco
+from .fitness import total_fitness
+from .load_ledger import LoadLedger
+
+EARTH_RADIUS_KM = 6371
+
+def _chord_to_km(dot):
+    """Great-circle distance (km) from the dot product of two unit vectors."""
+    return EARTH_RADIUS_KM * np.arccos(np.clip(dot, -1.0, 1.0))
+
+def kmeans_regions(points, num_regions, iterations=20, chunk_size=100000, seed=None):
+    """
+    Spherical k-means on unit vectors.
+
+    Labels are computed in chunks so memory stays at chunk_size x num_regions.
+
+    Args:
+        points: (N, 3) unit vectors
+        num_regions: Number of clusters
+        iterations: Lloyd iterations
+        chunk_size: Points labelled per block
+        seed: Seed for picking initial centroids
+
+    Returns:
+        labels: (N,) region index per point
+        centroids: (num_regions, 3) unit vectors
+    """
+    rng = np.random.default_rng(seed)
+    num_regions = min(num_regions, len(points))
+    centroids = points[rng.choice(len(points), num_regions, replace=False)]
+    labels = np.zeros(len(points), dtype=np.int64)
+
+    for _ in range(iterations):
+        for start in range(0, len(points), chunk_size):
+            block = points[start:start + chunk_size]
+            labels[start:start + chunk_size] = (block @ centroids.T).argmax(axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, points)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        sums[empty] = centroids[empty]  # Keep centroids of empty clusters in place
+        norms[empty] = 1
+        new_centroids = sums / norms
+        if np.allclose(new_centroids, centroids):
+            break
+        centroids = new_centroids
+
+    return labels, centroids
+
+def hierarchical_regions(points, region_size, branching=16, iterations=20, seed=None):
+    """
+    Recursive spherical k-means with at most `branching` clusters per split.
+
+    Any cluster larger than `region_size` is split again, so each level costs
+    O(N * branching * iterations) and there are about
+    log_branching(N / region_size) levels; clustering a flat k-means into
+    N / region_size regions would instead cost O(N^2 / region_size).
+
+    Args:
+        points: (N, 3) unit vectors
+        region_size: Maximum points per region
+        branching: Clusters per split
+        iterations: Lloyd iterations per split
+        seed: Seed for the splits
+
+    Returns:
+        labels: (N,) region index per point
+        centroids: (num_regions, 3) unit vectors
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.zeros(len(points), dtype=np.int64)
+    centroids = []
+    pending = [np.arange(len(points))]
+
+    while pending:
+        members = pending.pop()
+        if len(members) <= region_size:
+            centroid = points[members].sum(axis=0)
+            centroids.append(centroid / (np.linalg.norm(centroid) or 1))
+            labels[members] = len(centroids) - 1
+            continue
+
+        k = min(branching, math.ceil(len(members) / region_size))
+        local, _ = kmeans_regions(points[members], k, iterations=iterations,
+                                  seed=int(rng.integers(2 ** 31)))
+        children = [members[local == c] for c in range(k)]
+        children = [child for child in children if len(child)]
+        if len(children) == 1:
+            # Coincident points k-means cannot separate: split them by position
+            children = np.array_split(members, k)
+        pending.extend(children)
+
+    return labels, np.array(centroids)
+
+def nearest_servers(points, server_points, k, chunk_size=100000):
+    """
+    Returns the indices of the k nearest servers to every point, nearest first.
+    """
+    k = min(k, len(server_points))
+    result = np.empty((len(points), k), dtype=np.int64)
+    for start in range(0, len(points), chunk_size):
+        dots = points[start:start + chunk_size] @ server_points.T
+        top = np.argpartition(-dots, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(dots, top, axis=1), axis=1)
+        result[start:start + chunk_size] = np.take_along_axis(top, order, axis=1)
+    return result
+
+def _solve_region(cities, servers, params, seed):
+    """
+    Solves one region with its own colony (run in a worker process).
+
+    Returns the local assignment and the region's server statuses, since the
+    colony may have activated a down server.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    # Region servers are shared with neighbouring regions, so the colony's
+    # load-based on/off rule (which sees only this region's load) stays off
+    result = run_aco(cities, servers, verbose=False, **dict(params, manage_servers=False))
+    return result['best_assignment'], [server['Status'] for server in servers]
+
+def _is_overloaded(ledger, server, server_idx, extra=0.0):
+    load_percent = (ledger.load(server_idx) + extra) / server['Capacity'] * 100
+    return server['CPU_Health'] + load_percent > server['Threshold']
+
+def repair_assignment(assignment, cities, servers, city_points, server_points, alpha=1.0, gamma=0.5,
+                      neighbours=5, passes=3, distances=None):
+    """
+    Stitching pass after independent regional solves.
+
+    First moves cities off servers whose projected CPU exceeds their threshold,
+    to the nearest of their `neighbours` closest running servers that has room,
+    cheapest distance increase first. Then moves cities between neighbouring
+    running servers whenever that lowers alpha * distance + gamma * imbalance,
+    using a LoadLedger so each candidate move is scored in O(1).
+
+    Args:
+        assignment: Global city -> server assignment
+        cities, servers: Typed instance
+        city_points, server_points: Unit vectors from `utils.geo.unit_vectors`; they pick
+                                    the candidate servers, and score moves when
+                                    `distances` is not given
+        alpha, gamma: Fitness weights for distance and load imbalance
+        neighbours: Candidate servers considered per city
+        passes: Maximum improvement passes
+        distances: Global (num_cities, num_servers) cost matrix the moves are
+                   scored with (great-circle km when omitted)
+
+    Returns:
+        The repaired assignment and the number of cities moved
+    """
+    ledger = LoadLedger(cities, servers, assignment)
+    candidates = nearest_servers(city_points, server_points, neighbours)
+    running = [server['Status'] == 'Running' for server in servers]
+    moved = 0
+
+    def city_distance(city_idx, server_idx):
+        if distances is not None:
+            return distances[city_idx, server_idx]
+        return _chord_to_km(city_points[city_idx] @ server_points[server_idx])
+
+    # 1. Capacity repair
+    cities_by_server = {}
+    for city_idx, server_idx in enumerate(assignment):
+        cities_by_server.setdefault(server_idx, []).append(city_idx)
+
+    for server_idx, server in enumerate(servers):
+        if not _is_overloaded(ledger, server, server_idx):
+            continue
+        options = []
+        for city_idx in cities_by_server.get(server_idx, []):
+            current = city_distance(city_idx, server_idx)
+            for target in candidates[city_idx]:
+                if target != server_idx and running[target]:
+                    options.append((city_distance(city_idx, target) - current, city_idx, int(target)))
+        for _, city_idx, target in sorted(options):
+            if not _is_overloaded(ledger, server, server_idx):
+                break
+            if ledger.assignment[city_idx] != server_idx:
+                continue
+            if _is_overloaded(ledger, servers[target], target, ledger.usage[city_idx]):
+                continue
+            ledger.move(city_idx, target)
+            moved += 1
+
+    # 2. Imbalance / distance local search
+    for _ in range(passes):
+        improved = 0
+        for city_idx in range(len(cities)):
+            current = int(ledger.assignment[city_idx])
+            base = alpha * city_distance(city_idx, current) + gamma * ledger.imbalance()
+            best_target, best_cost = current, base
+            for target in candidates[city_idx]:
+                target = int(target)
+                if target == current or not running[target]:
+                    continue
+                if _is_overloaded(ledger, servers[target], target, ledger.usage[city_idx]):
+                    continue
+                ledger.move(city_idx, target)
+                cost = alpha * city_distance(city_idx, target) + gamma * ledger.imbalance()
+                ledger.move(city_idx, current)
+                if cost < best_cost - 1e-9:
+                    best_target, best_cost = target, cost
+            if best_target != current:
+                ledger.move(city_idx, best_target)
+                improved += 1
+        moved += improved
+        if not improved:
+            break
+
+    return [int(s) for s in ledger.assignment], moved
+
+def run_aco_decomposed(cities, servers, num_regions=None, region_size=300, servers_per_region=8,
+                       processes=None, neighbours=5, repair_passes=3, seed=None, verbose=True,
+                       **aco_params):
+    """
+    Hierarchical solve for very large instances.
+
+    Cities are clustered into regions of at most `region_size` by recursive
+    spherical k-means on 3D unit vectors (see `hierarchical_regions`).
+    Each region is solved by its own colony over the servers near it (the
+    `servers_per_region` closest to the region centroid plus the nearest server
+    of every city in the region), in parallel. A stitching pass then repairs
+    capacity violations across regions and reduces the global imbalance term.
+    Each colony only sees about `region_size` cities and a handful of
+    servers, so the regional solves grow linearly with the number of cities,
+    and clustering grows as N log N. An explicit `num_regions` uses one flat
+    k-means instead, which costs O(N * num_regions) per Lloyd iteration.
+
+    Args:
+        cities: List of typed city dictionaries
+        servers: List of typed server dictionaries
+        num_regions: Number of regions for a flat k-means (by default regions
+                     are split recursively down to region_size)
+        region_size: Maximum cities per region when num_regions is not given
+        servers_per_region: Servers offered to each region around its centroid
+        processes: Worker processes for the regional solves (None uses all cores)
+        neighbours: Candidate servers per city in the repair pass
+        repair_passes: Maximum local search passes in the repair
+        seed: Seed for clustering and regional solves
+        verbose: Print progress
+        **aco_params: Passed to `run_aco` for every region. A `cost_source`
+                      is opened once over the full instance; each region gets
+                      its rows/columns of it, and the repair pass and final
+                      cost use it too (great-circle km when omitted)
+
+    Returns:
+        Dict with 'best_assignment', 'best_cost', 'regions' (label per city),
+        and 'repair_moves'
+    """
+    alpha = aco_params.get('alpha', 1.0)
+    beta = aco_params.get('beta', 1.0)
+    gamma = aco_params.get('gamma', 0.5)
+    aco_params = dict(aco_params)
+    cost_source = aco_params.pop('cost_source', None)
+    # Sources such as RTTMatrixCost map cities/servers to matrix positions, so
+    # the matrix must be built over the full instance, never per region
+    distances = cost_source.matrix(cities, servers) if cost_source is not None else None
+
+    city_points = unit_vectors([c['lat'] for c in cities], [c['long'] for c in cities])
+    server_points = unit_vectors([s['lat'] for s in servers], [s['long'] for s in servers])
+    if num_regions is None:
+        labels, centroids = hierarchical_regions(city_points, region_size, seed=seed)
+    else:
+        labels, centroids = kmeans_regions(city_points, num_regions, seed=seed)
+    nearest = nearest_servers(city_points, server_points, 1)[:, 0]
+    centroid_servers = nearest_servers(centroids, server_points, servers_per_region)
+
+    tasks = []
+    for region in range(len(centroids)):
+        members = np.flatnonzero(labels == region)
+        if len(members) == 0:
+            continue
+        region_servers = sorted(set(centroid_servers[region].tolist()) | set(nearest[members].tolist()))
+        region_distances = None
+        if distances is not None:
+            region_distances = np.vstack([np.asarray(distances[c])[region_servers] for c in members])
+        tasks.append((
+            members,
+            region_servers,
+            [cities[i] for i in members],
+            [copy.deepcopy(servers[s]) for s in region_servers],
+            region_distances,
+        ))
+
+    if verbose:
+        print(f"[INFO] Decomposed {len(cities)} cities into {len(tasks)} regions")
+
+    seeds = [None if seed is None else seed + i for i in range(len(tasks))]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        region_results = list(pool.map(
+            _solve_region,
+            [task[2] for task in tasks],
+            [task[3] for task in tasks],
+            [dict(aco_params, distances=task[4]) for task in tasks],
+            seeds
+        ))
+
+    assignment = [-1] * len(cities)
+    for (members, region_servers, _, _, _), (local, statuses) in zip(tasks, region_results):
+        for city_idx, local_server in zip(members, local):
+            server_idx = region_servers[local_server]
+            assignment[city_idx] = server_idx
+            # A region colony may have activated a down server it had to use
+            if statuses[local_server] == 'Running' and servers[server_idx]['Status'] == 'Down':
+                servers[server_idx]['Status'] = 'Running'
+
+    assignment, moves = repair_assignment(assignment, cities, servers, city_points, server_points,
+                                          alpha=alpha, gamma=gamma, neighbours=neighbours,
+                                          passes=repair_passes, distances=distances)
+    if verbose:
+        print(f"[INFO] Repair pass moved {moves} cities")
+
+    return {
+        'best_assignment': assignment,
+        'best_cost': total_fitness(assignment, cities, servers, alpha, beta, gamma, distances),
+        'regions': labels,
+        'repair_moves': moves,
+    }
@@ -1,7 +1,7 @@
 import numpy as np
 from utils.geo import haversine_distance
 
-def total_fitness(assignment, cities, servers, alpha=1.0, beta=1.0, gamma=1.0):
+def total_fitness(assignment, cities, servers, alpha=1.0, beta=1.0, gamma=1.0, distances=None):
     """
     Multi-objective fitness function for evaluating a city's server assignment.
     
@@ -19,6 +19,8 @@ def total_fitness(assignment, cities, servers, alpha=1.0, beta=1.0, gamma=1.0):
         alpha (float): Weight for distance component.
         beta (float): Weight for CPU health penalty.
         gamma (float): Weight for server utilization balancing.
+        distances (np.ndarray, optional): Precomputed (num_cities, num_servers)
+                                          distance matrix in kilometers.
 
     Returns:
         float: Total fitness cost (lower is better).
@@ -34,10 +36,13 @@ def total_fitness(assignment, cities, servers, alpha=1.0, beta=1.0, gamma=1.0):
         server = servers[server_idx]
 
         # Haversine distance (in kilometers)
-        distance = haversine_distance(
-            city['lat'], city['long'],
-            server['lat'], server['long']
-        )
+        if distances is not None:
+            distance = distances[city_idx, server_idx]
+        else:
+            distance = haversine_distance(
+                city['lat'], city['long'],
+                server['lat'], server['long']
+            )
 
         # Accumulate server load
         server_loads[server_idx] += city['UsagePerHour']
@@ -0,0 +1,122 @@
+import numpy as np
+
+class LoadLedger:
+    def __init__(self, cities, servers, assignment=None):
+        """
+        Tracks per-server load for a city-server assignment and keeps the
+        aggregate metrics over running servers up to date as cities move.
+
+        Args:
+            cities (List[dict]): Each dict must include 'UsagePerHour'.
+            servers (List[dict]): Each dict must include 'Capacity' and 'Status'.
+            assignment (List[int], optional): Initial mapping from city index to
+                                              server index (-1 for unassigned).
+        """
+        self.usage = np.array([float(c['UsagePerHour']) for c in cities], dtype=np.float64)
+        self.capacity = np.array([float(s['Capacity']) for s in servers], dtype=np.float64)
+        self.running = np.array([s['Status'] == 'Running' for s in servers], dtype=bool)
+        self.loads = np.zeros(len(servers), dtype=np.float64)
+        self.assignment = np.full(len(cities), -1, dtype=np.int64)
+
+        if assignment is not None:
+            self.assignment = np.asarray(assignment, dtype=np.int64).copy()
+            assigned = self.assignment >= 0
+            np.add.at(self.loads, self.assignment[assigned], self.usage[assigned])
+
+        self._recompute_aggregates()
+
+    def _recompute_aggregates(self):
+        """Rebuilds the running-server sums from the per-server arrays (O(S))."""
+        running_loads = self.loads[self.running]
+        self._num_running = int(self.running.sum())
+        self._sum_load = float(running_loads.sum())
+        self._sum_sq_load = float((running_loads ** 2).sum())
+        self._sum_util = float((running_loads / self.capacity[self.running]).sum())
+
+    def _add_load(self, server_idx, amount):
+        old = self.loads[server_idx]
+        new = old + amount
+        self.loads[server_idx] = new
+        if self.running[server_idx]:
+            self._sum_load += amount
+            self._sum_sq_load += new * new - old * old
+            self._sum_util += amount / self.capacity[server_idx]
+
+    def move(self, city_idx, server_idx):
+        """
+        Reassigns a single city, updating loads and aggregates in O(1).
+
+        Args:
+            city_idx (int): Index of the city.
+            server_idx (int): New server index (-1 to unassign).
+        """
+        old_server = self.assignment[city_idx]
+        if old_server == server_idx:
+            return
+        usage = self.usage[city_idx]
+        if old_server >= 0:
+            self._add_load(old_server, -usage)
+        if server_idx >= 0:
+            self._add_load(server_idx, usage)
+        self.assignment[city_idx] = server_idx
+
+    def reassign(self, assignment):
+        """
+        Moves the ledger to a new assignment, touching only the cities whose
+        server changed.
+
+        Args:
+            assignment (List[int]): New mapping from city index to server index.
+        """
+        assignment = np.asarray(assignment, dtype=np.int64)
+        for city_idx in np.flatnonzero(assignment != self.assignment):
+            self.move(city_idx, int(assignment[city_idx]))
+
+    def set_status(self, server_idx, status):
+        """
+        Marks a server as 'Running' or 'Down' and updates the aggregates.
+        """
+        running = status == 'Running'
+        if self.running[server_idx] == running:
+            return
+        load = self.loads[server_idx]
+        sign = 1 if running else -1
+        self.running[server_idx] = running
+        self._num_running += sign
+        self._sum_load += sign * load
+        self._sum_sq_load += sign * load * load
+        self._sum_util += sign * load / self.capacity[server_idx]
+
+    def sync_status(self, servers):
+        """
+        Picks up status changes made directly on the server dicts (O(S)).
+        """
+        for server_idx, server in enumerate(servers):
+            self.set_status(server_idx, server['Status'])
+
+    def load(self, server_idx):
+        """Returns the current load of a server."""
+        return float(self.loads[server_idx])
+
+    def utilization(self, server_idx):
+        """Returns the current load of a server as a fraction of its capacity."""
+        return float(self.loads[server_idx] / self.capacity[server_idx])
+
+    def active_servers(self):
+        """Returns the number of running servers."""
+        return self._num_running
+
+    def avg_utilization(self):
+        """Returns the mean utilization over running servers (0 if none)."""
+        if self._num_running == 0:
+            return 0.0
+        return self._sum_util / self._num_running
+
+    def imbalance(self):
+        """
+        Returns the sum of squared deviations from the mean load over running
+        servers, i.e. the load balancing term of `total_fitness`.
+        """
+        if self._num_running == 0:
+            return 0.0
+        return max(0.0, self._sum_sq_load - self._sum_load ** 2 / self._num_running)
@@ -21,6 +21,7 @@ class PheromoneMatrix:
         """
         self.min_val = min_val
         self.max_val = max_val
+        self.initial_val = initial_val
         self.matrix = np.full((num_cities, num_servers), initial_val, dtype=np.float32)
 
     def update(self, city_idx: int, server_idx: int, delta: float):
@@ -73,6 +74,12 @@ class PheromoneMatrix:
         """
         return self.matrix.copy()
 
+    def reset(self):
+        """
+        Resets every path back to the initial pheromone value.
+        """
+        self.matrix.fill(self.initial_val)
+
     def normalize(self):
         """
         Normalizes pheromone values row-wise (per city), so each city's pheromones sum to 1.
@@ -0,0 +1,219 @@
+import json
+import os
+
+import numpy as np
+
+from .aco_runner import run_aco
+from .fitness import total_fitness
+
+class SolutionCache:
+    def __init__(self, path=None, max_entries=256, policy='lru', quantum=0.001,
+                 tolerance=0.05, max_distance=0.1, num_planes=12, seed=0, autosave=True):
+        """
+        Persistent cache of solved assignments keyed by demand state.
+
+        A demand state is each city's share of total `UsagePerHour` relative to
+        the mean share (so 1.0 is an average city at any instance size),
+        quantized to `quantum`, together with the server status mask. Lookups
+        find the nearest cached state with the same mask: random-hyperplane
+        hashing narrows the search to one bucket, with a scan of all entries
+        for that mask when the bucket is empty.
+
+        Args:
+            path (str, optional): JSON file the cache is loaded from and saved to.
+            max_entries (int): Maximum number of cached solutions.
+            policy (str): Eviction policy, 'lru' or 'lfu'.
+            quantum (float): Quantization step of the relative demand shares.
+            tolerance (float): Maximum relative cost difference for serving a
+                               cached assignment without solving.
+            max_distance (float): Maximum mean absolute difference between relative
+                                  demand shares for serving without solving (equal
+                                  to the L1 distance of the demand distributions).
+            num_planes (int): Hyperplanes (signature bits) for the hashing.
+            seed (int): Seed of the hyperplanes.
+            autosave (bool): Save to `path` after every insertion.
+        """
+        if policy not in ('lru', 'lfu'):
+            raise ValueError(f"Unknown eviction policy {policy!r}")
+        self.path = path
+        self.max_entries = max_entries
+        self.policy = policy
+        self.quantum = quantum
+        self.tolerance = tolerance
+        self.max_distance = max_distance
+        self.num_planes = num_planes
+        self.seed = seed
+        self.autosave = autosave
+
+        self.entries = {}
+        self.buckets = {}
+        self._planes = {}
+        self._clock = 0
+        self._next_id = 0
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def _key_vector(self, usage):
+        usage = np.asarray(usage, dtype=np.float64)
+        total = usage.sum()
+        # Relative to the mean share, so shares stay well above the quantum
+        # however many cities there are
+        relative = usage * (len(usage) / total) if total > 0 else usage
+        return np.round(relative / self.quantum) * self.quantum
+
+    @staticmethod
+    def _mask(servers):
+        return ''.join('R' if s['Status'] == 'Running' else 'D' for s in servers)
+
+    def _signature(self, vector):
+        dimension = len(vector)
+        if dimension not in self._planes:
+            rng = np.random.default_rng(self.seed + dimension)
+            self._planes[dimension] = rng.standard_normal((self.num_planes, dimension))
+        # Center on the uniform distribution so the planes split real demand states
+        bits = self._planes[dimension] @ (vector - 1.0) > 0
+        return ''.join('1' if b else '0' for b in bits)
+
+    def _touch(self, entry):
+        self._clock += 1
+        entry['last_used'] = self._clock
+        entry['hits'] += 1
+
+    def lookup(self, usage, servers):
+        """
+        Returns (entry, distance) for the nearest cached demand state with the
+        same server mask, or None.
+        """
+        vector = self._key_vector(usage)
+        mask = self._mask(servers)
+        ids = self.buckets.get((mask, self._signature(vector)))
+        if not ids:
+            ids = [i for i, e in self.entries.items() if e['mask'] == mask]
+        if not ids:
+            return None
+
+        ids = list(ids)
+        vectors = np.array([self.entries[i]['vector'] for i in ids])
+        distances = np.abs(vectors - vector).mean(axis=1)
+        nearest = int(distances.argmin())
+        return self.entries[ids[nearest]], float(distances[nearest])
+
+    def put(self, usage, servers, assignment, cost):
+        """Stores a solution for a demand state, evicting if the cache is full."""
+        vector = self._key_vector(usage)
+        mask = self._mask(servers)
+        bucket = (mask, self._signature(vector))
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._clock += 1
+        self.entries[entry_id] = {
+            'vector': vector,
+            'mask': mask,
+            'bucket': bucket,
+            'assignment': [int(s) for s in assignment],
+            'cost': float(cost),
+            'hits': 0,
+            'last_used': self._clock,
+        }
+        self.buckets.setdefault(bucket, set()).add(entry_id)
+
+        while len(self.entries) > self.max_entries:
+            self._evict()
+        if self.path and self.autosave:
+            self.save()
+
+    def _evict(self):
+        if self.policy == 'lru':
+            victim = min(self.entries, key=lambda i: self.entries[i]['last_used'])
+        else:
+            victim = min(self.entries, key=lambda i: (self.entries[i]['hits'], self.entries[i]['last_used']))
+        entry = self.entries.pop(victim)
+        self.buckets[entry['bucket']].discard(victim)
+        if not self.buckets[entry['bucket']]:
+            del self.buckets[entry['bucket']]
+
+    def solve(self, cities, servers, **aco_params):
+        """
+        Serves an assignment for the current demand, solving only when needed.
+
+        The nearest cached assignment is re-scored on the current demand; if the
+        demand state is within `max_distance` and the cost is within `tolerance`
+        of the cost it had when cached, it is returned immediately, otherwise it
+        seeds `run_aco` as the incumbent. Without a
+        cached neighbour the solver runs cold.
+
+        Args:
+            cities: List of typed city dictionaries
+            servers: List of typed server dictionaries
+            **aco_params: Passed to `run_aco`; alpha/beta/gamma also score cached entries
+
+        Returns:
+            Dict with 'best_assignment', 'best_cost' and 'source' ('cache',
+            'warm' or 'cold')
+        """
+        usage = [city['UsagePerHour'] for city in cities]
+        weights = {k: aco_params.get(k, d) for k, d in (('alpha', 1.0), ('beta', 1.0), ('gamma', 0.5))}
+        distances = aco_params.get('distances')
+        match = self.lookup(usage, servers)
+        servers_before = [dict(s) for s in servers]  # run_aco may switch servers on/off
+
+        incumbent = None
+        if match is not None:
+            entry, distance = match
+            self._touch(entry)
+            predicted = total_fitness(entry['assignment'], cities, servers, distances=distances, **weights)
+            if (distance <= self.max_distance
+                    and abs(predicted - entry['cost']) <= self.tolerance * max(abs(entry['cost']), 1e-9)):
+                return {'best_assignment': list(entry['assignment']), 'best_cost': predicted, 'source': 'cache'}
+            incumbent = entry['assignment']
+
+        result = run_aco(cities, servers, initial_assignment=incumbent, **aco_params)
+        self.put(usage, servers_before, result['best_assignment'], result['best_cost'])
+        return {
+            'best_assignment': result['best_assignment'],
+            'best_cost': result['best_cost'],
+            'source': 'warm' if incumbent is not None else 'cold',
+        }
+
+    def save(self, path=None):
+        """Writes the cache to disk (atomically)."""
+        path = path or self.path
+        payload = {
+            'settings': {'quantum': self.quantum, 'num_planes': self.num_planes, 'seed': self.seed,
+                         'relative_shares': True},
+            'clock': self._clock,
+            'entries': [
+                {**{k: v for k, v in e.items() if k not in ('vector', 'bucket')}, 'vector': e['vector'].tolist()}
+                for e in self.entries.values()
+            ],
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path=None):
+        """Loads entries written by `save`, re-hashing them."""
+        with open(path or self.path) as f:
+            payload = json.load(f)
+        settings = payload['settings']
+        self.quantum = settings['quantum']
+        self.num_planes = settings['num_planes']
+        self.seed = settings['seed']
+        self.entries, self.buckets, self._planes = {}, {}, {}
+        self._clock = payload['clock']
+
+        for stored in payload['entries']:
+            vector = np.array(stored['vector'])
+            if not settings.get('relative_shares'):
+                vector = vector * len(vector)  # Older caches stored shares summing to 1
+            bucket = (stored['mask'], self._signature(vector))
+            entry_id = self._next_id
+            self._next_id += 1
+            self.entries[entry_id] = dict(stored, vector=vector, bucket=bucket)
+            self.buckets.setdefault(bucket, set()).add(entry_id)
+
+        while len(self.entries) > self.max_entries:
+            self._evict()
@@ -0,0 +1,280 @@
+import argparse
+import json
+import sys
+import time
+
+import config
+
+def log(args, message):
+    """Prints a progress message to stderr unless --quiet is set."""
+    if not args.quiet:
+        print(message, file=sys.stderr)
+
+def load_instance(args):
+    from utils.loader import load_csv, prepare_instance
+
+    cities = load_csv(args.cities)
+    if getattr(args, 'logs', None):
+        cities = ingest(args, cities)
+    return prepare_instance(cities, load_csv(args.servers))
+
+def ingest(args, cities):
+    """Replaces the cities' UsagePerHour with usage aggregated from access logs."""
+    from utils.ingest import DemandIndex, ingest_logs
+
+    index = DemandIndex.load(args.index) if args.index else None
+    columns = {'timestamp': args.timestamp_column, 'region': args.region_column, 'weight': args.weight_column}
+    # Coordinates default to columns 1 and 2 unless a region column replaces them
+    for name in ('lat', 'long'):
+        value = getattr(args, f'{name}_column')
+        if value != 'default':
+            columns[name] = value
+    cities, stats = ingest_logs(args.logs, cities, index=index, columns=columns,
+                                window_hours=args.window_hours, statistic=args.statistic,
+                                scale=args.scale, verbose=False)
+    log(args, f"[INFO] Ingested {stats['records']} records over {stats['hours']} hours "
+              f"({stats['skipped']} skipped, {stats['unmapped']} unmapped, {stats['late']} late)")
+    return cities
+
+def solver_params(args):
+    return {
+        'alpha': args.alpha,
+        'beta': args.beta,
+        'gamma': args.gamma,
+        'evaporation': args.evaporation,
+        'iterations': args.iterations,
+        'num_ants': args.ants,
+        'q0': args.q0,
+        'time_budget': args.time_budget,
+        'adaptive': args.adaptive,
+        'min_ants': config.MIN_ANTS,
+        'tolerance': config.STALL_TOLERANCE,
+        'patience': config.STALL_PATIENCE,
+        'max_restarts': config.MAX_RESTARTS,
+    }
+
+def solve_instance(cities, servers, params, seed=None):
+    """
+    Runs the solver and packs the result into a JSON-serializable dict.
+    """
+    import random
+
+    from aco.aco_runner import run_aco
+    from aco.load_ledger import LoadLedger
+
+    if seed is not None:
+        random.seed(seed)
+
+    start = time.perf_counter()
+    result = run_aco(cities, servers, verbose=False, **params)
+    solve_seconds = time.perf_counter() - start
+
+    assignment = [int(s) for s in result['best_assignment']]
+    ledger = LoadLedger(cities, servers, assignment)
+    return {
+        'best_cost': float(result['best_cost']),
+        'iterations_run': result['iterations_run'],
+        'stop_reason': result['stop_reason'],
+        'solve_seconds': solve_seconds,
+        'params': params,
+        'assignment': [
+            {'city': city.get('City', i), 'server': servers[s].get('CDN_ID', s), 'server_idx': s}
+            for i, (city, s) in enumerate(zip(cities, assignment))
+        ],
+        'servers': [
+            {
+                'server': server.get('CDN_ID', i),
+                'status': server['Status'],
+                'load': ledger.load(i),
+                'utilization': ledger.utilization(i),
+            }
+            for i, server in enumerate(servers)
+        ],
+        'best_cost_each_iteration': [float(c) for c in result['best_assignment_each_iteration']],
+    }
+
+def cmd_generate(args):
+    from utils.generator import generate_city_data, generate_server_data
+
+    generate_city_data(args.cities)
+    generate_server_data(args.servers)
+    log(args, f"[INFO] Wrote {args.cities} and {args.servers}")
+
+def cmd_solve(args):
+    if args.generate:
+        cmd_generate(args)
+    cities, servers = load_instance(args)
+    log(args, f"[INFO] Solving {len(cities)} cities x {len(servers)} servers...")
+    output = solve_instance(cities, servers, solver_params(args), seed=args.seed)
+    log(args, f"[INFO] Best cost {output['best_cost']:.2f} after {output['iterations_run']} iterations "
+              f"({output['stop_reason']})")
+
+    text = json.dumps(output, indent=2 if args.pretty else None)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        log(args, f"[INFO] Results written to {args.output}")
+    else:
+        print(text)
+
+def cmd_ingest(args):
+    from utils.loader import load_csv
+
+    cities = load_csv(args.cities)
+    if args.save_index:
+        from utils.ingest import DemandIndex
+
+        path = DemandIndex(cities).save(args.save_index)
+        log(args, f"[INFO] Demand index written to {path}")
+        if not args.index:
+            args.index = path
+    if args.logs:
+        print(json.dumps(ingest(args, cities), indent=2 if args.pretty else None))
+
+def cmd_render(args):
+    cities, servers = load_instance(args)
+    with open(args.results) as f:
+        results = json.load(f)
+
+    statuses = {entry['server']: entry for entry in results['servers']}
+    for i, server in enumerate(servers):
+        entry = statuses.get(server.get('CDN_ID', i))
+        if entry:
+            server['Status'] = entry['status']
+            server['CPU_Health'] = min(100, entry['utilization'] * 100) if entry['status'] == 'Running' else 0
+    assignment = [entry['server_idx'] for entry in results['assignment']]
+
+    # Only the render command pays for matplotlib and cartopy
+    from visualization.animate_ants import plot_best_assignment_progress, plot_map
+
+    log(args, "[INFO] Rendering assignment map...")
+    plot_map(cities, servers, [assignment])
+    if not args.no_progress:
+        plot_best_assignment_progress(results['best_cost_each_iteration'])
+
+def cmd_bench(args):
+    import importlib
+
+    timings = {}
+    start = time.perf_counter()
+    importlib.import_module('aco.aco_runner')
+    timings['import_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cities, servers = load_instance(args)
+    timings['load_seconds'] = time.perf_counter() - start
+
+    params = solver_params(args)
+    solves = []
+    for repeat in range(args.repeats):
+        output = solve_instance(cities, [dict(s) for s in servers], params,
+                                seed=None if args.seed is None else args.seed + repeat)
+        solves.append({'seconds': output['solve_seconds'], 'best_cost': output['best_cost'],
+                       'iterations_run': output['iterations_run']})
+        log(args, f"[INFO] Run {repeat + 1}/{args.repeats}: {output['solve_seconds']:.3f}s, "
+                  f"cost {output['best_cost']:.2f}")
+
+    seconds = sorted(run['seconds'] for run in solves)
+    timings.update({
+        'runs': solves,
+        'solve_seconds_min': seconds[0],
+        'solve_seconds_median': seconds[len(seconds) // 2],
+        'solve_seconds_max': seconds[-1],
+    })
+    print(json.dumps(timings, indent=2 if args.pretty else None))
+
+def column_arg(value):
+    """Parses a column position, or 'none' for a column the logs do not have."""
+    if value.lower() == 'none':
+        return None
+    if value == 'default':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a column number or 'none', got {value!r}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='ACO-based CDN edge server assignment')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Suppress progress messages on stderr')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_instance_args(sub):
+        sub.add_argument('--cities', default='data/cities.csv')
+        sub.add_argument('--servers', default='data/edge_servers.csv')
+
+    def add_solver_args(sub):
+        sub.add_argument('--alpha', type=float, default=config.ALPHA)
+        sub.add_argument('--beta', type=float, default=config.BETA)
+        sub.add_argument('--gamma', type=float, default=config.GAMMA)
+        sub.add_argument('--evaporation', type=float, default=config.EVAPORATION_RATE)
+        sub.add_argument('--iterations', type=int, default=config.NUM_ITERATIONS)
+        sub.add_argument('--ants', type=int, default=config.NUM_ANTS)
+        sub.add_argument('--q0', type=float, default=config.Q0)
+        sub.add_argument('--time-budget', type=float, help='Wall-clock seconds for the solve')
+        sub.add_argument('--adaptive', action=argparse.BooleanOptionalAction, default=config.ADAPTIVE_COLONY,
+                         help='Adaptive colony sizing and early stopping')
+        sub.add_argument('--seed', type=int)
+        sub.add_argument('--pretty', action='store_true', help='Indent JSON output')
+
+    def add_log_args(sub):
+        sub.add_argument('--logs', nargs='+', help='Access logs (plain or gzip) to take UsagePerHour from')
+        sub.add_argument('--index', help='Prebuilt demand index written by `ingest --save-index`')
+        sub.add_argument('--timestamp-column', type=int, default=0)
+        sub.add_argument('--lat-column', type=column_arg, default='default',
+                         help="Column holding the client latitude, or 'none' (1 unless --region-column is set)")
+        sub.add_argument('--long-column', type=column_arg, default='default',
+                         help="Column holding the client longitude, or 'none' (2 unless --region-column is set)")
+        sub.add_argument('--region-column', type=int, help='Column holding a region code')
+        sub.add_argument('--weight-column', type=int, help='Column holding a per-request weight')
+        sub.add_argument('--window-hours', type=int, default=24)
+        sub.add_argument('--statistic', choices=('mean', 'peak'), default='mean')
+        sub.add_argument('--scale', type=float, default=1.0, help='Usage units per request')
+
+    generate = subparsers.add_parser('generate', help='Regenerate the city and server CSV files')
+    add_instance_args(generate)
+    generate.set_defaults(func=cmd_generate)
+
+    solve = subparsers.add_parser('solve', help='Solve an instance and emit JSON results')
+    add_instance_args(solve)
+    add_solver_args(solve)
+    add_log_args(solve)
+    solve.add_argument('--generate', action='store_true', help='Regenerate the data before solving')
+    solve.add_argument('-o', '--output', help='Write JSON to this file instead of stdout')
+    solve.set_defaults(func=cmd_solve)
+
+    ingest_parser = subparsers.add_parser('ingest', help='Aggregate access logs into a JSON city table')
+    ingest_parser.add_argument('--cities', default='data/cities.csv', help='Demand points')
+    add_log_args(ingest_parser)
+    ingest_parser.add_argument('--save-index', help='Build the demand index and write it here')
+    ingest_parser.add_argument('--pretty', action='store_true', help='Indent JSON output')
+    ingest_parser.set_defaults(func=cmd_ingest)
+
+    render = subparsers.add_parser('render', help='Plot results written by `solve`')
+    add_instance_args(render)
+    render.add_argument('results', help='JSON file written by `solve --output`')
+    render.add_argument('--no-progress', action='store_true', help='Skip the convergence plot')
+    render.set_defaults(func=cmd_render)
+
+    bench = subparsers.add_parser('bench', help='Time imports, loading and repeated solves')
+    add_instance_args(bench)
+    add_solver_args(bench)
+    bench.add_argument('--repeats', type=int, default=3)
+    bench.set_defaults(func=cmd_bench)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except KeyboardInterrupt:
+        print("\n[STOPPED] Interrupted by user.", file=sys.stderr)
+        return 130
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(f"[ERROR] {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
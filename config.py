@@ -6,3 +6,10 @@ EVAPORATION_RATE = 0.6
 NUM_ITERATIONS = 500
 NUM_ANTS = 40
 Q0 = 0.2
+
+# Adaptive colony sizing and convergence-based early stopping
+ADAPTIVE_COLONY = True
+MIN_ANTS = 5
+STALL_TOLERANCE = 1e-4
+STALL_PATIENCE = 25
+MAX_RESTARTS = 1
@@ -1,10 +1,11 @@
 import time
 from utils.generator import generate_city_data, generate_fake_data, generate_server_data
 from aco.aco_runner import run_aco
+from aco.load_ledger import LoadLedger
 from utils.geo import adjust_usage_based_on_time
-from utils.loader import load_csv
-from visualization.animate_ants import plot_best_assignment_progress, plot_map
-from config import ALPHA, BETA, GAMMA, NUM_ITERATIONS, NUM_ANTS, Q0
+from utils.loader import load_csv, prepare_instance
+from config import (ALPHA, BETA, GAMMA, NUM_ITERATIONS, NUM_ANTS, Q0, ADAPTIVE_COLONY,
+                    MIN_ANTS, STALL_TOLERANCE, STALL_PATIENCE, MAX_RESTARTS)
 import numpy as np
 
 def run_aco_and_visualize(cities, servers, num_iterations=NUM_ITERATIONS, num_ants=NUM_ANTS):
@@ -29,17 +30,7 @@ def run_aco_and_visualize(cities, servers, num_iterations=NUM_ITERATIONS, num_an
     }
 
     # Convert data types
-    for city in cities:
-        city['lat'] = float(city['lat'])
-        city['long'] = float(city['long'])
-        city['UsagePerHour'] = int(city['UsagePerHour'])
-
-    for server in servers:
-        server['lat'] = float(server['lat'])
-        server['long'] = float(server['long'])
-        server['CPU_Health'] = float(server['CPU_Health'])
-        server['Threshold'] = float(server['Threshold'])
-        server['Capacity'] = float(server.get('Capacity', 15000))  # Default capacity
+    prepare_instance(cities, servers)
 
     print(f"[INFO] Starting ACO optimization with {num_iterations} iterations...")
     
@@ -52,36 +43,37 @@ def run_aco_and_visualize(cities, servers, num_iterations=NUM_ITERATIONS, num_an
         gamma=GAMMA,
         q0=Q0,
         iterations=num_iterations,
-        num_ants=num_ants
+        num_ants=num_ants,
+        adaptive=ADAPTIVE_COLONY,
+        min_ants=MIN_ANTS,
+        tolerance=STALL_TOLERANCE,
+        patience=STALL_PATIENCE,
+        max_restarts=MAX_RESTARTS
     )
 
+    print(f"[INFO] Stopped after {aco_results['iterations_run']} iterations: {aco_results['stop_reason']}")
+
     best_assignment = aco_results['best_assignment']
     best_assignment_each_iteration = aco_results['best_assignment_each_iteration']
     # ant_paths = aco_results['last_iteration_paths']
 
     # Update server statuses based on final assignment
-    server_loads = {server['CDN_ID']: 0 for server in servers}
-    # server_indices = {server['CDN_ID']: i for i, server in enumerate(servers)}
-
-    # Calculate server loads and update CPU health
-    for city_idx, server_idx in enumerate(best_assignment):
-        server = servers[server_idx]
-        city = cities[city_idx]
-        server_loads[server['CDN_ID']] += city['UsagePerHour']
-        
-        # Update CPU health based on load
-        utilization = server_loads[server['CDN_ID']] / server['Capacity']
-        server['CPU_Health'] = min(100, utilization * 100)  # Cap at 100%
+    ledger = LoadLedger(cities, servers, best_assignment)
+    server_loads = {server['CDN_ID']: ledger.load(i) for i, server in enumerate(servers)}
 
-    # Update server statuses
-    for server in servers:
+    # Update CPU health and statuses based on load
+    for server_idx, server in enumerate(servers):
         cdn_id = server['CDN_ID']
         if server_loads[cdn_id] < server['Capacity'] * 0.2:  # 30% threshold
             server['Status'] = 'Down'
             server['CPU_Health'] = 0  # Reset CPU health when down
         else:
+            server['CPU_Health'] = min(100, ledger.utilization(server_idx) * 100)  # Cap at 100%
             server['Status'] = 'Running'
 
+    # Imported here so headless callers never load matplotlib/cartopy
+    from visualization.animate_ants import plot_best_assignment_progress, plot_map
+
     # Visualize final result
     print("[INFO] Visualizing final optimization result...")
     plot_map(cities, servers, [best_assignment])
@@ -101,6 +93,8 @@ def run_aco_and_visualize(cities, servers, num_iterations=NUM_ITERATIONS, num_an
         'utilization_history': aco_results['server_utilization'],
         'active_servers_history': aco_results['active_servers'],
         'best_cost': aco_results['best_cost'],
+        'stop_reason': aco_results['stop_reason'],
+        'colony_history': aco_results['colony_history'],
     })
 
     return results
@@ -128,5 +122,6 @@ if __name__ == '__main__':
         
     except KeyboardInterrupt:
         print("\n[STOPPED] Simulation stopped by user.")
-    except Exception as e:
-        print(f"\n[ERROR] Simulation failed: {str(e)}")
\ No newline at end of file
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(f"\n[ERROR] Simulation failed: {type(e).__name__}: {e}")
+        raise SystemExit(1)
\ No newline at end of file
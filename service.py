@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aco.aco_runner import run_aco
+from utils.cost import HaversineCost
+from utils.loader import load_csv, prepare_instance
+from config import ALPHA, BETA, GAMMA, EVAPORATION_RATE, NUM_ITERATIONS, NUM_ANTS, Q0
+
+# Longest request line accepted; inline `load` requests carry whole instances
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+# run_aco keywords a client may set; the rest are managed by the service
+SOLVER_PARAMS = {
+    'alpha', 'beta', 'gamma', 'iterations', 'num_ants', 'evaporation', 'q0', 'min_pheromone',
+    'max_pheromone', 'adaptive', 'min_ants', 'tolerance', 'patience', 'max_restarts',
+}
+
+class ServiceError(Exception):
+    """Raised for requests the service rejects; the message is sent to the client."""
+
+class Instance:
+    def __init__(self, cities, servers, cost_source=None):
+        """
+        A resident problem instance: typed cities/servers, cost matrix and
+        the warm-start state (pheromones, last assignment) carried between solves.
+
+        Args:
+            cities: List of typed city dictionaries
+            servers: List of typed server dictionaries
+            cost_source: utils.cost.CostSource (haversine km by default)
+        """
+        self.cities = cities
+        self.servers = servers
+        self.distances = (cost_source or HaversineCost()).matrix(cities, servers)
+        self.city_index = {city['City']: i for i, city in enumerate(cities) if 'City' in city}
+        self.server_index = {server['CDN_ID']: i for i, server in enumerate(servers) if 'CDN_ID' in server}
+        self.pheromones = None
+        self.last_assignment = None
+        self.lock = threading.Lock()
+
+    def update(self, usage=None, status=None):
+        """
+        Applies demand and server-status updates.
+
+        Args:
+            usage: Dict mapping a city name or index to its new 'UsagePerHour'
+            status: Dict mapping a CDN_ID or index to 'Running' or 'Down'
+
+        Nothing is applied unless every entry is valid.
+        """
+        if not isinstance(usage or {}, dict) or not isinstance(status or {}, dict):
+            raise ServiceError("'usage' and 'status' must be objects")
+        usage_updates = []
+        for key, value in (usage or {}).items():
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ServiceError(f"Invalid usage {value!r} for {key!r}")
+            if value < 0:
+                raise ServiceError(f"Negative usage {value!r} for {key!r}")
+            usage_updates.append((self._resolve(key, self.city_index, len(self.cities)), value))
+
+        status_updates = []
+        for key, value in (status or {}).items():
+            if value not in ('Running', 'Down'):
+                raise ServiceError(f"Invalid status {value!r}")
+            status_updates.append((self._resolve(key, self.server_index, len(self.servers)), value))
+
+        for city_idx, value in usage_updates:
+            self.cities[city_idx]['UsagePerHour'] = value
+        for server_idx, value in status_updates:
+            self.servers[server_idx]['Status'] = value
+            if self.last_assignment is not None and value == 'Down' and server_idx in self.last_assignment:
+                self.last_assignment = None  # Incumbent now uses a down server
+
+    @staticmethod
+    def _resolve(key, index, size):
+        if isinstance(key, str) and key in index:
+            return index[key]
+        try:
+            position = int(key)
+        except ValueError:
+            raise ServiceError(f"Unknown key {key!r}")
+        if not 0 <= position < size:
+            raise ServiceError(f"Index {key!r} out of range (0-{size - 1})")
+        return position
+
+    def solve(self, time_budget, params):
+        """
+        Runs the solver warm-started from the previous solve.
+
+        The solver's own server on/off decisions are made on a copy so that
+        statuses set through `update` stay authoritative.
+        """
+        if not isinstance(params, dict):
+            raise ServiceError("'params' must be an object")
+        unknown = sorted(set(params) - SOLVER_PARAMS)
+        if unknown:
+            raise ServiceError(f"Unknown solver params: {', '.join(unknown)}")
+
+        servers = [dict(server) for server in self.servers]
+        options = {
+            'alpha': ALPHA, 'beta': BETA, 'gamma': GAMMA, 'evaporation': EVAPORATION_RATE,
+            'iterations': NUM_ITERATIONS, 'num_ants': NUM_ANTS, 'q0': Q0,
+        }
+        options.update(params)
+
+        result = run_aco(
+            self.cities, servers,
+            time_budget=time_budget,
+            initial_assignment=self.last_assignment,
+            pheromones=self.pheromones,
+            distances=self.distances,
+            verbose=False,
+            **options
+        )
+        self.pheromones = result['pheromones']
+        self.last_assignment = list(result['best_assignment'])
+
+        return {
+            'assignment': [int(s) for s in self.last_assignment],
+            'assignment_ids': [servers[s].get('CDN_ID', s) for s in self.last_assignment],
+            'server_status': [server['Status'] for server in servers],
+            'cost': float(result['best_cost']),
+            'iterations': result['iterations_run'],
+        }
+
+class OptimizationService:
+    def __init__(self, workers=2, max_queue=16, deadline_margin=0.005):
+        """
+        Keeps instances resident and serves newline-delimited JSON requests.
+
+        Solves run on a bounded thread pool; at most `workers + max_queue`
+        requests are admitted at once and the rest are rejected as busy.
+
+        Args:
+            workers: Number of solver threads
+            max_queue: Number of admitted requests that may wait for a worker
+            deadline_margin: Seconds reserved from each deadline for response overhead
+        """
+        self.instances = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = asyncio.Semaphore(workers + max_queue)
+        self.deadline_margin = deadline_margin
+
+    def _instance(self, request):
+        name = request.get('instance', 'default')
+        if name not in self.instances:
+            raise ServiceError(f"Instance {name!r} is not loaded")
+        return self.instances[name]
+
+    def _load(self, request):
+        if 'cities' in request:
+            cities, servers = request['cities'], request['servers']
+        else:
+            cities = load_csv(request.get('cities_path', 'data/cities.csv'))
+            servers = load_csv(request.get('servers_path', 'data/edge_servers.csv'))
+        prepare_instance(cities, servers)
+        name = request.get('instance', 'default')
+        self.instances[name] = Instance(cities, servers)
+        return {'instance': name, 'cities': len(cities), 'servers': len(servers)}
+
+    def _update(self, request):
+        instance = self._instance(request)
+        with instance.lock:
+            instance.update(request.get('usage'), request.get('status'))
+        return {}
+
+    def _solve(self, request, deadline):
+        instance = self._instance(request)
+        with instance.lock:
+            remaining = deadline - time.perf_counter() - self.deadline_margin if deadline else None
+            if remaining is not None and remaining <= 0:
+                raise ServiceError("Deadline exceeded while queued")
+            return instance.solve(remaining, request.get('params', {}))
+
+    async def handle_request(self, request):
+        """
+        Dispatches one request.
+
+        Operations:
+            load:   {"op": "load", "instance": name, "cities_path"/"servers_path" or "cities"/"servers"}
+            update: {"op": "update", "instance": name, "usage": {city: value}, "status": {cdn_id: status}}
+            solve:  {"op": "solve", "instance": name, "deadline_ms": 200, "params": {run_aco keywords}}
+            drop:   {"op": "drop", "instance": name}
+            ping:   {"op": "ping"}
+
+        Returns:
+            Response dict with 'ok' and either the result fields or 'error'
+        """
+        received = time.perf_counter()
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': 'Request must be a JSON object'}
+        op = request.get('op')
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'drop':
+            self.instances.pop(request.get('instance', 'default'), None)
+            return {'ok': True}
+
+        if self.slots.locked():
+            return {'ok': False, 'error': 'Service busy'}
+
+        async with self.slots:
+            loop = asyncio.get_running_loop()
+            if op == 'load':
+                call = lambda: self._load(request)
+            elif op == 'update':
+                call = lambda: self._update(request)
+            elif op == 'solve':
+                deadline_ms = request.get('deadline_ms')
+                if deadline_ms is not None and (isinstance(deadline_ms, bool)
+                                                or not isinstance(deadline_ms, (int, float)) or deadline_ms <= 0):
+                    return {'ok': False, 'error': f"Invalid deadline_ms {deadline_ms!r}"}
+                deadline = received + deadline_ms / 1000 if deadline_ms else None
+                call = lambda: self._solve(request, deadline)
+            else:
+                return {'ok': False, 'error': f"Unknown op {op!r}"}
+
+            try:
+                result = await loop.run_in_executor(self.executor, call)
+            except ServiceError as e:
+                return {'ok': False, 'error': str(e)}
+            except Exception as e:
+                # Any other failure is reported to this client instead of dropping the connection
+                return {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+        result.update(ok=True, elapsed_ms=(time.perf_counter() - received) * 1000)
+        return result
+
+    async def handle_connection(self, reader, writer):
+        """Serves newline-delimited JSON requests on one connection."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # The rest of an over-long line cannot be told apart from the
+                    # next request, so report the error and close the connection
+                    response = {'ok': False, 'error': 'Request line too long'}
+                    writer.write(json.dumps(response).encode() + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    response = await self.handle_request(json.loads(line))
+                except json.JSONDecodeError as e:
+                    response = {'ok': False, 'error': f"Invalid JSON: {e}"}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+async def serve(host='127.0.0.1', port=8765, socket_path=None, workers=2, max_queue=16, preload=True,
+                max_request_bytes=MAX_REQUEST_BYTES):
+    """
+    Starts the service on a TCP port or, if `socket_path` is given, a Unix socket.
+
+    Request lines longer than `max_request_bytes` are rejected.
+    """
+    service = OptimizationService(workers=workers, max_queue=max_queue)
+    if preload:
+        print(f"[INFO] Preloaded instance: {await service.handle_request({'op': 'load'})}")
+
+    if socket_path:
+        server = await asyncio.start_unix_server(service.handle_connection, path=socket_path,
+                                                 limit=max_request_bytes)
+        print(f"[INFO] Service listening on unix:{socket_path}")
+    else:
+        server = await asyncio.start_server(service.handle_connection, host, port, limit=max_request_bytes)
+        print(f"[INFO] Service listening on {host}:{port}")
+
+    async with server:
+        await server.serve_forever()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Long-running CDN assignment optimization service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', dest='socket_path', help='Serve on a Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-queue', type=int, default=16)
+    parser.add_argument('--no-preload', action='store_true', help='Do not load data/*.csv at startup')
+    parser.add_argument('--max-request-bytes', type=int, default=MAX_REQUEST_BYTES)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.socket_path, args.workers,
+                          args.max_queue, preload=not args.no_preload,
+                          max_request_bytes=args.max_request_bytes))
+    except KeyboardInterrupt:
+        print("\n[STOPPED] Service stopped by user.")
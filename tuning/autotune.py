@@ -0,0 +1,155 @@
+import json
+import math
+import os
+import time
+
+from .sweep import DEFAULT_PARAMS, random_points, run_sweep, summarize_sweep
+
+DEFAULT_SPACE = {
+    'alpha': (0.3, 2.0),
+    'evaporation': (0.05, 0.7),
+    'q0': (0.0, 0.9),
+    'num_ants': (5, 60),
+    'min_pheromone': [0.01, 0.1, 0.5],
+    'max_pheromone': [5.0, 10.0, 50.0],
+}
+
+def successive_halving(cities, servers, space=None, num_configs=27, min_iterations=5,
+                       max_iterations=200, eta=3, cpu_budget=600.0, seeds=(0,),
+                       base_params=None, cache_dir='.cache/sweep', processes=None, seed=None):
+    """
+    Tunes solver parameters by successive halving under a CPU-seconds budget.
+
+    All sampled configurations start at `min_iterations`; after each rung only
+    the best 1/eta are kept and their iteration count is multiplied by eta.
+    Rung costs are estimated from the CPU time per ant-iteration measured so
+    far, starting with a single probe run of the first configuration. The
+    first rung is cut down to the configurations that fit in the budget;
+    later rungs are only started if they fit entirely. Only runs computed
+    here count against the budget, not results served from the sweep cache.
+
+    Args:
+        cities: List of typed city dictionaries
+        servers: List of typed server dictionaries
+        space: Search space in `random_points` format (defaults to DEFAULT_SPACE)
+        num_configs: Number of configurations in the first rung
+        min_iterations: Iterations per run in the first rung
+        max_iterations: Iteration cap for the last rung
+        eta: Halving rate
+        cpu_budget: Total CPU seconds to spend across all runs
+        seeds: Seeds each configuration is run with per rung
+        base_params: Fixed `run_aco` keywords (e.g. beta, gamma)
+        cache_dir: Sweep result cache directory (None disables caching)
+        processes: Worker process count
+        seed: Seed for sampling configurations
+
+    Returns:
+        Dict with the winning params (with `iterations` set to max_iterations,
+        ready for `run_aco`), its mean cost, CPU seconds used and the per-rung
+        history
+    """
+    configs = random_points(space or DEFAULT_SPACE, num_configs, seed=seed)
+    default_ants = dict(DEFAULT_PARAMS, **(base_params or {}))['num_ants']
+    iterations = min_iterations
+    cpu_used = 0.0
+    history = []
+    best = None
+
+    def ant_iterations(results):
+        return max(1, sum(r['iterations_run'] * r['params']['num_ants'] for r in results))
+
+    def new_cpu(results):
+        return sum(r['cpu_time'] for r in results if not r.get('cached'))
+
+    # Probe one run to price the first rung; it is reused from the cache by that rung
+    probe = run_sweep(cities, servers, [dict(configs[0], iterations=iterations)], seeds=seeds[:1],
+                      base_params=base_params, cache_dir=cache_dir, processes=processes)
+    cpu_used += new_cpu(probe)
+    cpu_per_ant_iteration = sum(r['cpu_time'] for r in probe) / ant_iterations(probe)
+
+    while configs:
+        config_cost = [cpu_per_ant_iteration * iterations * config.get('num_ants', default_ants) * len(seeds)
+                       for config in configs]
+        if not history:
+            affordable, spent = 0, cpu_used
+            for cost in config_cost:
+                if spent + cost > cpu_budget and affordable:
+                    break
+                spent += cost
+                affordable += 1
+            if affordable < len(configs):
+                print(f"[INFO] Autotune: budget allows {affordable}/{len(configs)} configs in the first rung")
+                configs = configs[:affordable]
+        elif cpu_used + sum(config_cost) > cpu_budget:
+            print(f"[INFO] Autotune: budget exhausted before rung at {iterations} iterations")
+            break
+
+        points = [dict(config, iterations=iterations) for config in configs]
+        results = run_sweep(cities, servers, points, seeds=seeds, base_params=base_params,
+                            cache_dir=cache_dir, processes=processes)
+        rung_cpu = new_cpu(results)
+        cpu_used += rung_cpu
+        cpu_per_ant_iteration = sum(r['cpu_time'] for r in results) / ant_iterations(results)
+
+        rows = summarize_sweep(results)
+        best = rows[0]
+        history.append({
+            'iterations': iterations,
+            'configs': len(configs),
+            'cpu_seconds': rung_cpu,
+            'best_cost': best['mean_cost'],
+        })
+        print(f"[INFO] Autotune rung: {len(configs)} configs x {iterations} iterations, "
+              f"best cost {best['mean_cost']:.2f}, CPU used {cpu_used:.1f}/{cpu_budget:.1f}s")
+
+        if len(configs) == 1 or iterations >= max_iterations:
+            break
+
+        keep = max(1, len(configs) // eta)
+        configs = [{k: v for k, v in row['params'].items() if k in configs[0]} for row in rows[:keep]]
+        iterations = min(max_iterations, iterations * eta)
+
+    return {
+        'params': dict(best['params'], iterations=max_iterations) if best else None,
+        'mean_cost': best['mean_cost'] if best else math.inf,
+        'cpu_seconds': cpu_used,
+        'history': history,
+    }
+
+def write_profile(instance_class, tuning_result, cities, servers, directory='profiles'):
+    """
+    Writes a tuned parameter profile for an instance class to `<directory>/<instance_class>.json`.
+
+    Returns:
+        Path of the written profile
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{instance_class}.json')
+    profile = {
+        'instance_class': instance_class,
+        'num_cities': len(cities),
+        'num_servers': len(servers),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        **tuning_result,
+    }
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+def load_profile(instance_class, directory='profiles'):
+    """
+    Returns the tuned `run_aco` keyword arguments stored for an instance class.
+    """
+    with open(os.path.join(directory, f'{instance_class}.json')) as f:
+        return json.load(f)['params']
+
+if __name__ == '__main__':
+    import sys
+
+    from utils.loader import load_csv, prepare_instance
+
+    instance_class = sys.argv[1] if len(sys.argv) > 1 else 'default'
+    cities, servers = prepare_instance(load_csv('data/cities.csv'), load_csv('data/edge_servers.csv'))
+    result = successive_halving(cities, servers, cpu_budget=120.0, max_iterations=45,
+                                base_params={'beta': 0.0, 'gamma': 0.0})
+    print(f"[INFO] Profile written to {write_profile(instance_class, result, cities, servers)}")
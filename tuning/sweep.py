@@ -0,0 +1,247 @@
+import copy
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from aco.aco_runner import run_aco
+from aco.fitness import total_fitness
+from config import ALPHA, BETA, GAMMA, EVAPORATION_RATE, NUM_ITERATIONS, NUM_ANTS, Q0
+
+DEFAULT_PARAMS = {
+    'alpha': ALPHA,
+    'beta': BETA,
+    'gamma': GAMMA,
+    'evaporation': EVAPORATION_RATE,
+    'iterations': NUM_ITERATIONS,
+    'num_ants': NUM_ANTS,
+    'q0': Q0,
+}
+
+def instance_fingerprint(cities, servers):
+    """
+    Returns a stable hash of the fields of an instance that affect the solver.
+    """
+    payload = {
+        'cities': [[c['lat'], c['long'], c['UsagePerHour']] for c in cities],
+        'servers': [[s['lat'], s['long'], s['Capacity'], s['CPU_Health'], s['Threshold'], s['Status']]
+                    for s in servers],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def point_key(instance_hash, params, seed, objective):
+    """Returns the cache key for one (instance, params, seed, objective) run."""
+    payload = json.dumps({'instance': instance_hash, 'params': params, 'seed': seed,
+                          'objective': objective}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResultCache:
+    def __init__(self, directory='.cache/sweep'):
+        """
+        On-disk cache of sweep results, one JSON file per run key.
+
+        Args:
+            directory (str): Directory holding the cached results.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        """Returns the cached result for `key`, or None."""
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key, result):
+        """Stores a result, replacing the file atomically."""
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, self._path(key))
+
+def grid_points(space):
+    """
+    Expands a parameter grid into a list of parameter dicts.
+
+    Args:
+        space: Dict mapping a `run_aco` keyword to a list of values
+    """
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+def random_points(space, num_points, seed=None):
+    """
+    Samples parameter dicts at random.
+
+    Args:
+        space: Dict mapping a `run_aco` keyword to either a list of choices or a
+               (low, high) tuple; tuples of ints sample integers, otherwise floats
+        num_points: Number of points to sample
+        seed: Seed for the sampler
+    """
+    rng = random.Random(seed)
+    points = []
+    for _ in range(num_points):
+        point = {}
+        for name in sorted(space):
+            values = space[name]
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    point[name] = rng.randint(low, high)
+                else:
+                    point[name] = rng.uniform(low, high)
+            else:
+                point[name] = rng.choice(values)
+        points.append(point)
+    return points
+
+def run_point(cities, servers, params, seed, objective):
+    """
+    Runs the solver once for a parameter dict and seed.
+
+    The instance is copied first since `run_aco` switches servers on and off.
+    Because alpha/beta/gamma also weight the solver's own cost, the best
+    assignment is re-scored on the original instance with the fixed
+    `objective` weights so that runs with different weights are comparable.
+
+    Returns:
+        Dict with the params, seed, solver cost, objective cost, wall time and CPU time
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    solver_servers = copy.deepcopy(servers)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = run_aco(cities, solver_servers, verbose=False, **params)
+    runtime = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+
+    return {
+        'params': params,
+        'seed': seed,
+        'best_cost': float(result['best_cost']),
+        'objective_cost': float(total_fitness(result['best_assignment'], cities, servers, **objective)),
+        'runtime': runtime,
+        'cpu_time': cpu_time,
+        'iterations_run': result['iterations_run'],
+    }
+
+def run_sweep(cities, servers, points, seeds=(0,), base_params=None,
+              cache_dir='.cache/sweep', processes=None):
+    """
+    Runs every (point, seed) combination, reusing cached results.
+
+    Args:
+        cities: List of typed city dictionaries
+        servers: List of typed server dictionaries
+        points: List of parameter dicts (see `grid_points` / `random_points`)
+        seeds: Seeds to run for every point
+        base_params: Defaults for parameters a point does not set (config.py values);
+                     its alpha/beta/gamma are also the weights every run is scored with
+        cache_dir: Result cache directory (None disables caching)
+        processes: Worker process count (None uses all cores)
+
+    Returns:
+        List of result dicts, in (point, seed) order; 'cached' tells whether a
+        result was served from the cache instead of computed by this call
+    """
+    base_params = dict(DEFAULT_PARAMS, **(base_params or {}))
+    objective = {name: base_params[name] for name in ('alpha', 'beta', 'gamma')}
+    cache = ResultCache(cache_dir) if cache_dir else None
+    instance_hash = instance_fingerprint(cities, servers)
+
+    jobs = []
+    for point in points:
+        params = dict(base_params, **point)
+        for seed in seeds:
+            jobs.append((point_key(instance_hash, params, seed, objective), params, seed))
+
+    results = {}
+    pending = []
+    for key, params, seed in jobs:
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            results[key] = dict(cached, cached=True)
+        else:
+            pending.append((key, params, seed))
+
+    print(f"[INFO] Sweep: {len(jobs)} runs, {len(jobs) - len(pending)} cached, {len(pending)} to compute")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {
+                pool.submit(run_point, cities, servers, params, seed, objective): key
+                for key, params, seed in pending
+            }
+            for future, key in futures.items():
+                result = future.result()
+                if cache:
+                    cache.put(key, result)
+                results[key] = dict(result, cached=False)
+
+    return [results[key] for key, _, _ in jobs]
+
+def summarize_sweep(results):
+    """
+    Aggregates results over seeds, one row per parameter dict, sorted by mean
+    objective cost.
+    """
+    groups = {}
+    for result in results:
+        key = json.dumps(result['params'], sort_keys=True)
+        groups.setdefault(key, []).append(result)
+
+    rows = []
+    for key, group in groups.items():
+        costs = [r['objective_cost'] for r in group]
+        rows.append({
+            'params': json.loads(key),
+            'runs': len(group),
+            'mean_cost': float(np.mean(costs)),
+            'std_cost': float(np.std(costs)),
+            'mean_runtime': float(np.mean([r['runtime'] for r in group])),
+        })
+    return sorted(rows, key=lambda r: r['mean_cost'])
+
+def format_summary(rows):
+    """Renders `summarize_sweep` rows as a plain-text table."""
+    names = sorted({name for row in rows for name in row['params']})
+    header = [*names, 'runs', 'mean_cost', 'std_cost', 'runtime_s']
+    lines = [header]
+    for row in rows:
+        lines.append([*(str(row['params'][n]) for n in names), str(row['runs']),
+                      f"{row['mean_cost']:.2f}", f"{row['std_cost']:.2f}", f"{row['mean_runtime']:.3f}"])
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    return '\n'.join('  '.join(cell.rjust(w) for cell, w in zip(line, widths)) for line in lines)
+
+def cheapest_meeting_quality(rows, max_cost):
+    """
+    Returns the fastest row whose mean cost is at most `max_cost`, or None.
+    """
+    eligible = [row for row in rows if row['mean_cost'] <= max_cost]
+    return min(eligible, key=lambda r: r['mean_runtime']) if eligible else None
+
+if __name__ == '__main__':
+    from utils.loader import load_csv, prepare_instance
+
+    cities, servers = prepare_instance(load_csv('data/cities.csv'), load_csv('data/edge_servers.csv'))
+    points = grid_points({
+        'alpha': [0.5, 1.0],
+        'evaporation': [0.1, 0.3, 0.6],
+        'num_ants': [10, 40],
+    })
+    rows = summarize_sweep(run_sweep(cities, servers, points, seeds=(0, 1),
+                                     base_params={'iterations': 30}))
+    print(format_summary(rows))
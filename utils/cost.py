@@ -0,0 +1,153 @@
+import numpy as np
+
+from utils.geo import distance_matrix
+
+EARTH_RADIUS_KM = 6371
+
+class CostSource:
+    """
+    Produces the city x server cost matrix consumed by the ants and `total_fitness`.
+
+    `matrix(cities, servers)` returns an object indexable as `m[city_idx]`
+    (a row over all servers) and `m[city_idx, server_idx]` (a scalar).
+    """
+
+    def matrix(self, cities, servers):
+        raise NotImplementedError
+
+class HaversineCost(CostSource):
+    """Great-circle distance in kilometers (the default)."""
+
+    def matrix(self, cities, servers):
+        return distance_matrix(cities, servers)
+
+class EquirectangularCost(CostSource):
+    """
+    Equirectangular approximation in kilometers.
+
+    Cheaper than haversine and accurate for dense, local grids where city and
+    server are a few hundred kilometers apart; it degrades over long distances
+    and near the poles.
+    """
+
+    def matrix(self, cities, servers):
+        city_lat = np.radians([float(c['lat']) for c in cities])[:, None]
+        city_lon = np.radians([float(c['long']) for c in cities])[:, None]
+        server_lat = np.radians([float(s['lat']) for s in servers])[None, :]
+        server_lon = np.radians([float(s['long']) for s in servers])[None, :]
+        dlon = (server_lon - city_lon + np.pi) % (2 * np.pi) - np.pi
+        x = dlon * np.cos((city_lat + server_lat) / 2)
+        y = server_lat - city_lat
+        return EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+
+class RTTMatrixCost(CostSource):
+    def __init__(self, path, num_rows, num_cols, dtype='float32', offset=0,
+                 row_ids=None, col_ids=None, row_key='City', col_key='CDN_ID',
+                 fallback=None):
+        """
+        Measured RTT matrix stored as a raw row-major binary file and read
+        through `np.memmap`, so only the rows that are used are paged in.
+
+        Pairs stored as NaN or a negative value are treated as missing and fall
+        back to `fallback` (haversine km by default). Note that the solver
+        weights are unit-less: mixing RTT milliseconds with fallback kilometers
+        only makes sense if the fallback is scaled accordingly.
+
+        Args:
+            path (str): Binary matrix file.
+            num_rows (int): Number of client regions (rows) in the file.
+            num_cols (int): Number of PoPs (columns) in the file.
+            dtype (str): Element type of the file.
+            offset (int): Byte offset of the matrix in the file.
+            row_ids (list, optional): Identifier of each file row, matched against
+                                      city[row_key]. Positional when omitted.
+            col_ids (list, optional): Identifier of each file column, matched against
+                                      server[col_key]. Positional when omitted.
+            fallback (CostSource, optional): Source for missing pairs.
+        """
+        self.path = path
+        self.shape = (num_rows, num_cols)
+        self.dtype = dtype
+        self.offset = offset
+        self.row_ids = row_ids
+        self.col_ids = col_ids
+        self.row_key = row_key
+        self.col_key = col_key
+        self.fallback = fallback or HaversineCost()
+        self._open()
+
+    def _open(self):
+        self.data = np.memmap(self.path, dtype=self.dtype, mode='r', offset=self.offset, shape=self.shape)
+
+    def __getstate__(self):
+        # Reopen the mapping in worker processes instead of pickling its contents
+        state = self.__dict__.copy()
+        del state['data']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    @staticmethod
+    def _positions(items, ids, key, size):
+        if ids is None:
+            if len(items) > size:
+                raise ValueError(f"{len(items)} items but the matrix only has {size} entries")
+            return np.arange(len(items))
+        index = {identifier: i for i, identifier in enumerate(ids)}
+        return np.array([index.get(item.get(key), -1) for item in items], dtype=np.int64)
+
+    def matrix(self, cities, servers):
+        rows = self._positions(cities, self.row_ids, self.row_key, self.shape[0])
+        cols = self._positions(servers, self.col_ids, self.col_key, self.shape[1])
+        return RTTMatrixView(self, cities, servers, rows, cols)
+
+class RTTMatrixView:
+    def __init__(self, source, cities, servers, rows, cols):
+        """
+        City x server view over a memory-mapped RTT matrix with per-pair fallback.
+        Rows are read from the file on access; missing pairs are filled from
+        the fallback source for that city only.
+        """
+        self.source = source
+        self.cities = cities
+        self.servers = servers
+        self.rows = rows
+        self.cols = cols
+        self.shape = (len(cities), len(servers))
+        self._known_cols = cols >= 0
+
+    def _row(self, city_idx):
+        row = np.full(len(self.servers), np.nan)
+        if self.rows[city_idx] >= 0:
+            row[self._known_cols] = self.source.data[self.rows[city_idx], self.cols[self._known_cols]]
+        missing = np.isnan(row) | (row < 0)
+        if missing.any():
+            fallback = self.source.fallback.matrix([self.cities[city_idx]], self.servers)
+            row[missing] = np.asarray(fallback[0])[missing]
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            city_idx, server_idx = key
+            row, col = self.rows[city_idx], self.cols[server_idx]
+            if row >= 0 and col >= 0:
+                value = float(self.source.data[row, col])
+                if value >= 0:  # False for NaN as well
+                    return value
+            fallback = self.source.fallback.matrix([self.cities[city_idx]], [self.servers[server_idx]])
+            return float(fallback[0, 0])
+        return self._row(key)
+
+    def __array__(self, dtype=None, copy=None):
+        """Materializes the full matrix (used by the vectorized batch solver)."""
+        dense = np.vstack([self._row(i) for i in range(self.shape[0])])
+        return dense if dtype is None else dense.astype(dtype)
+
+def write_rtt_matrix(path, matrix, dtype='float32'):
+    """
+    Writes a (client regions x PoPs) RTT matrix in the raw format read by
+    `RTTMatrixCost`; use NaN for unmeasured pairs.
+    """
+    np.asarray(matrix, dtype=dtype).tofile(path)
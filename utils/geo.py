@@ -1,6 +1,8 @@
 from math import radians, cos, sin, asin, sqrt
 import random
 
+import numpy as np
+
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371  # Earth radius in km
     lat1, lon1, lat2, lon2 = map(radians, [float(lat1), float(lon1), float(lat2), float(lon2)])
@@ -10,6 +12,37 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * asin(sqrt(a))
     return R * c
 
+def unit_vectors(lat, lon):
+    """
+    Returns (N, 3) unit vectors on the sphere for latitudes/longitudes in degrees.
+
+    The dot product of two such vectors is the cosine of their central angle,
+    so nearest-point searches reduce to a matrix product.
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+def distance_matrix(cities, servers):
+    """
+    Vectorized haversine distance (km) from every city to every server.
+
+    Args:
+        cities: List of dicts with 'lat' and 'long'
+        servers: List of dicts with 'lat' and 'long'
+
+    Returns:
+        np.ndarray of shape (num_cities, num_servers)
+    """
+    R = 6371  # Earth radius in km
+    city_lat = np.radians([float(c['lat']) for c in cities])[:, None]
+    city_lon = np.radians([float(c['long']) for c in cities])[:, None]
+    server_lat = np.radians([float(s['lat']) for s in servers])[None, :]
+    server_lon = np.radians([float(s['long']) for s in servers])[None, :]
+    a = (np.sin((server_lat - city_lat) / 2) ** 2
+         + np.cos(city_lat) * np.cos(server_lat) * np.sin((server_lon - city_lon) / 2) ** 2)
+    return 2 * R * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
 def adjust_usage_based_on_time(cities):
     """
     Adjusts UsagePerHour based on the assumption:
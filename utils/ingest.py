@@ -0,0 +1,376 @@
+import gzip
+import itertools
+
+import numpy as np
+
+from utils.geo import unit_vectors
+
+DEFAULT_COLUMNS = {'timestamp': 0, 'lat': 1, 'long': 2, 'region': None, 'weight': None}
+
+class DemandIndex:
+    def __init__(self, cities, resolution=0.5, region_map=None, block_size=65536):
+        """
+        Lookup table from client location to the nearest demand point (city).
+
+        The globe is divided into `resolution`-degree cells and the nearest city
+        to every cell center is precomputed, so locating a client is a single
+        array lookup. Clients are matched to the city nearest their cell center,
+        which is off by at most half a cell diagonal (~40 km at 0.5 degrees).
+
+        Args:
+            cities: List of dicts with 'City', 'lat' and 'long'
+            resolution (float): Cell size in degrees.
+            region_map (dict, optional): Region code -> city name; every city
+                                         name also maps to itself.
+            block_size (int): Cells processed per block while building the table.
+        """
+        self.resolution = resolution
+        self.num_lat = int(np.ceil(180 / resolution))
+        self.num_lon = int(np.ceil(360 / resolution))
+
+        self.city_names = [str(city.get('City', i)) for i, city in enumerate(cities)]
+        names = {city.get('City', i): i for i, city in enumerate(cities)}
+        self.regions = dict(names)
+        for code, name in (region_map or {}).items():
+            if name not in names:
+                raise ValueError(f"Region {code!r} maps to unknown city {name!r}")
+            self.regions[code] = names[name]
+
+        points = unit_vectors([float(c['lat']) for c in cities], [float(c['long']) for c in cities])
+        lat_centers = -90 + (np.arange(self.num_lat) + 0.5) * resolution
+        lon_centers = -180 + (np.arange(self.num_lon) + 0.5) * resolution
+        lat_grid, lon_grid = np.meshgrid(lat_centers, lon_centers, indexing='ij')
+        lat_grid, lon_grid = lat_grid.ravel(), lon_grid.ravel()
+
+        table = np.empty(lat_grid.size, dtype=np.int32)
+        for start in range(0, lat_grid.size, block_size):
+            cells = unit_vectors(lat_grid[start:start + block_size], lon_grid[start:start + block_size])
+            table[start:start + block_size] = (cells @ points.T).argmax(axis=1)
+        self.table = table.reshape(self.num_lat, self.num_lon)
+
+    def check_cities(self, cities):
+        """
+        Raises ValueError unless the index was built from exactly these cities,
+        in this order (its results are positions in that list).
+        """
+        names = [str(city.get('City', i)) for i, city in enumerate(cities)]
+        if len(names) != len(self.city_names):
+            raise ValueError(f"Demand index was built for {len(self.city_names)} cities, got {len(names)}")
+        mismatched = [i for i, (a, b) in enumerate(zip(names, self.city_names)) if a != b]
+        if mismatched:
+            i = mismatched[0]
+            raise ValueError(f"Demand index does not match the cities: position {i} is "
+                             f"{self.city_names[i]!r} in the index but {names[i]!r} in the table")
+
+    def locate(self, lat, lon):
+        """
+        Returns the demand point index for each coordinate, -1 for invalid ones.
+        """
+        lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+        valid = (np.abs(lat) <= 90) & (np.abs(lon) <= 180)  # Also rejects NaN
+        rows = np.clip(((np.where(valid, lat, 0) + 90) / self.resolution).astype(np.int64), 0, self.num_lat - 1)
+        cols = (((np.where(valid, lon, 0) + 180) / self.resolution).astype(np.int64)) % self.num_lon
+        return np.where(valid, self.table[rows, cols], -1)
+
+    def locate_regions(self, codes):
+        """Returns the demand point index for each region code, -1 for unknown codes."""
+        return np.array([self.regions.get(code, -1) for code in codes], dtype=np.int64)
+
+    def save(self, path):
+        """
+        Writes the prebuilt table so later runs can skip construction.
+
+        The file is written to `path` exactly as given (no '.npz' is appended),
+        so `load(path)` reads it back.
+
+        Returns:
+            The path written
+        """
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, table=self.table, resolution=self.resolution,
+                                city_names=np.array(self.city_names, dtype=str),
+                                region_codes=np.array(list(self.regions), dtype=str),
+                                region_cities=np.array(list(self.regions.values()), dtype=np.int64))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Loads a table written by `save`."""
+        with open(path, 'rb') as f:
+            data = dict(np.load(f))
+        index = cls.__new__(cls)
+        index.table = data['table']
+        index.resolution = float(data['resolution'])
+        index.num_lat, index.num_lon = index.table.shape
+        index.city_names = data['city_names'].tolist()
+        index.regions = dict(zip(data['region_codes'].tolist(), data['region_cities'].tolist()))
+        return index
+
+class HourlyUsage:
+    def __init__(self, num_cities, window_hours=24):
+        """
+        Per-city request totals for the most recent `window_hours` clock hours.
+
+        The window ends at the latest hour seen in the logs. Memory is bounded
+        by `window_hours * num_cities` regardless of log size: buckets that fall
+        out of the window are dropped, and records older than the window are
+        counted as late and ignored. Hours without traffic count as zero.
+
+        Args:
+            num_cities (int): Number of demand points.
+            window_hours (int): Length of the window in clock hours.
+        """
+        self.num_cities = num_cities
+        self.window_hours = window_hours
+        self.buckets = {}
+        self.first = None  # Earliest hour accepted into the window
+        self.latest = None
+        self.late = 0
+
+    @property
+    def floor(self):
+        """Earliest hour still inside the window."""
+        return None if self.latest is None else self.latest - self.window_hours + 1
+
+    @property
+    def hours(self):
+        """Number of clock hours the window spans (from the first record seen, at most window_hours)."""
+        if self.latest is None:
+            return 0
+        return self.latest - max(self.first, self.floor) + 1
+
+    def add(self, hours, city_idx, weights):
+        """
+        Adds one chunk of records.
+
+        Args:
+            hours: Integer hour (epoch seconds // 3600) of each record
+            city_idx: Demand point index of each record
+            weights: Request weight of each record
+        """
+        if hours.size == 0:
+            return
+        latest = int(hours.max())
+        if self.latest is None or latest > self.latest:
+            self.latest = latest
+            for hour in [h for h in self.buckets if h < self.floor]:
+                del self.buckets[hour]
+
+        on_time = hours >= self.floor
+        self.late += int((~on_time).sum())
+        hours, city_idx, weights = hours[on_time], city_idx[on_time], weights[on_time]
+        if hours.size == 0:
+            return
+        earliest = int(hours.min())
+        self.first = earliest if self.first is None else min(self.first, earliest)
+
+        unique_hours, inverse = np.unique(hours, return_inverse=True)
+        totals = np.bincount(inverse * self.num_cities + city_idx, weights=weights,
+                             minlength=unique_hours.size * self.num_cities)
+        for hour, row in zip(unique_hours.tolist(), totals.reshape(unique_hours.size, self.num_cities)):
+            if hour in self.buckets:
+                self.buckets[hour] += row
+            else:
+                self.buckets[hour] = row.copy()
+
+    def usage(self, statistic='mean'):
+        """
+        Per-city requests per hour over the window.
+
+        Args:
+            statistic (str): 'mean' (over every clock hour the window spans,
+                             including hours without traffic) or 'peak' (busiest hour).
+        """
+        if statistic not in ('mean', 'peak'):
+            raise ValueError(f"Unknown statistic {statistic!r}")
+        if not self.buckets:
+            return np.zeros(self.num_cities)
+        stacked = np.vstack(list(self.buckets.values()))
+        if statistic == 'mean':
+            return stacked.sum(axis=0) / self.hours
+        return stacked.max(axis=0)
+
+def open_log(path):
+    """Opens a plain or gzip-compressed log file as text, detected by its magic bytes."""
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    if compressed:
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+def read_chunks(path, chunk_lines=100000):
+    """Yields lists of at most `chunk_lines` lines from a log file."""
+    with open_log(path) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_lines))
+            if not lines:
+                break
+            yield lines
+
+def _parse_timestamps(values):
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        # ISO 8601 timestamps
+        parsed = np.array(values, dtype='datetime64[s]')
+        if np.isnat(parsed).any():
+            raise ValueError("Empty or invalid timestamp")
+        return parsed.astype(np.int64).astype(np.float64)
+
+def resolve_columns(columns=None):
+    """
+    Completes a column layout with DEFAULT_COLUMNS.
+
+    When a 'region' column is given without 'lat'/'long', the default
+    coordinate columns are dropped, so region-only logs need not carry them.
+
+    Raises:
+        ValueError: If only one coordinate column is set, or records could not
+                    be located by either region or coordinates
+    """
+    columns = dict(columns or {})
+    if columns.get('region') is not None and 'lat' not in columns and 'long' not in columns:
+        columns.update(lat=None, long=None)
+    columns = {**DEFAULT_COLUMNS, **columns}
+    if (columns['lat'] is None) != (columns['long'] is None):
+        raise ValueError("Set both 'lat' and 'long' columns or neither")
+    if columns['lat'] is None and columns['region'] is None:
+        raise ValueError("Need a 'region' column or 'lat'/'long' columns")
+    if columns['timestamp'] is None:
+        raise ValueError("A 'timestamp' column is required")
+    return columns
+
+def parse_chunk(lines, columns=None, delimiter=','):
+    """
+    Splits a chunk of log lines into columns.
+
+    Lines that are blank, comments, or have a missing or unparseable timestamp
+    or weight are dropped. Missing or unparseable coordinates become NaN and a
+    missing region code becomes '', so such records are counted as unmapped
+    instead (unless the other locator resolves them).
+
+    Args:
+        lines: List of raw lines
+        columns: Dict of column positions for 'timestamp', 'lat', 'long',
+                 'region' and 'weight' (None for absent columns), see
+                 `resolve_columns`
+        delimiter: Field separator
+
+    Returns:
+        (fields, skipped): dict of column name -> array, and the number of
+        dropped lines
+    """
+    columns = resolve_columns(columns)
+    required = {name: columns[name] for name in ('timestamp', 'weight') if columns[name] is not None}
+    optional = {name: columns[name] for name in ('lat', 'long', 'region') if columns[name] is not None}
+    width = max(required.values()) + 1
+
+    rows = [line.rstrip('\r\n').split(delimiter) for line in lines if line.strip() and not line.startswith('#')]
+    rows = [row for row in rows if len(row) >= width]
+    fields = _convert(rows, required)
+    if fields is None:
+        # Fall back to per-line conversion to isolate malformed lines
+        rows = [row for row in rows if _convert([row], required) is not None]
+        fields = _convert(rows, required)
+
+    for name, pos in optional.items():
+        values = [row[pos].strip() if len(row) > pos else '' for row in rows]
+        fields[name] = values if name == 'region' else _to_float(values)
+    return fields, len(lines) - len(rows)
+
+def _convert(rows, required):
+    try:
+        fields = {}
+        for name, pos in required.items():
+            values = [row[pos].strip() for row in rows]
+            if name == 'timestamp':
+                fields[name] = _parse_timestamps(values)
+            else:
+                fields[name] = np.array(values, dtype=np.float64)
+        return fields
+    except ValueError:
+        return None
+
+def _to_float(values):
+    """Converts strings to floats, with NaN for empty or malformed values."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        result = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                result[i] = float(value)
+            except ValueError:
+                pass
+        return result
+
+def ingest_logs(paths, cities, index=None, columns=None, delimiter=',', chunk_lines=100000,
+                window_hours=24, statistic='mean', scale=1.0, verbose=True):
+    """
+    Streams access logs into the typed city table the solver consumes.
+
+    Each record is mapped to a demand point by its region code when a 'region'
+    column is configured and the code is known, otherwise by its client
+    coordinates. Requests are totalled per clock hour in a bounded window
+    (see `HourlyUsage`) and turned into 'UsagePerHour'.
+
+    Args:
+        paths: Log file path or list of paths (plain or gzip)
+        cities: Demand points, dicts with 'City', 'lat' and 'long'
+        index: Prebuilt DemandIndex; must have been built from `cities` (built here if None)
+        columns: Column positions, see `resolve_columns`
+        delimiter: Field separator
+        chunk_lines: Lines read and processed per chunk
+        window_hours: Number of most recent hours aggregated
+        statistic: 'mean' or 'peak' requests per hour
+        scale: Multiplier from (weighted) requests to usage units
+        verbose: Print progress per file
+
+    Returns:
+        (cities, stats): new typed city dicts with 'UsagePerHour', and a dict
+        of line counters
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    if index is None:
+        index = DemandIndex(cities)
+    else:
+        index.check_cities(cities)
+    columns = resolve_columns(columns)
+    usage = HourlyUsage(len(cities), window_hours)
+    stats = {'lines': 0, 'records': 0, 'skipped': 0, 'unmapped': 0}
+
+    for path in paths:
+        for lines in read_chunks(path, chunk_lines):
+            fields, skipped = parse_chunk(lines, columns, delimiter)
+            stats['lines'] += len(lines)
+            stats['skipped'] += skipped
+            if not fields['timestamp'].size:
+                continue
+
+            city_idx = np.full(fields['timestamp'].size, -1, dtype=np.int64)
+            if 'region' in fields:
+                city_idx = index.locate_regions(fields['region'])
+            if 'lat' in fields and 'long' in fields:
+                missing = city_idx < 0
+                city_idx[missing] = index.locate(fields['lat'][missing], fields['long'][missing])
+
+            mapped = city_idx >= 0
+            stats['unmapped'] += int((~mapped).sum())
+            stats['records'] += int(mapped.sum())
+            weights = fields['weight'] if 'weight' in fields else np.ones(city_idx.size)
+            hours = (fields['timestamp'] // 3600).astype(np.int64)
+            usage.add(hours[mapped], city_idx[mapped], weights[mapped])
+
+        if verbose:
+            print(f"[INFO] Ingested {path}: {stats['records']} records so far, "
+                  f"{stats['skipped']} skipped, {stats['unmapped']} unmapped")
+
+    stats['late'] = usage.late
+    stats['hours'] = usage.hours
+    per_hour = np.rint(usage.usage(statistic) * scale).astype(np.int64)
+    table = [
+        {**city, 'lat': float(city['lat']), 'long': float(city['long']), 'UsagePerHour': int(value)}
+        for city, value in zip(cities, per_hour)
+    ]
+    return table, stats
@@ -3,4 +3,30 @@ import csv
 def load_csv(path):
     with open(path, newline='') as csvfile:
         reader = csv.DictReader(csvfile)
-        return [dict(row) for row in reader]
\ No newline at end of file
+        return [dict(row) for row in reader]
+
+def prepare_instance(cities, servers, default_capacity=15000):
+    """
+    Converts CSV string fields to the numeric types the solver expects (in place).
+
+    Args:
+        cities: List of city dictionaries
+        servers: List of server dictionaries
+        default_capacity: Capacity used for servers without a 'Capacity' column
+
+    Returns:
+        The same (cities, servers) lists
+    """
+    for city in cities:
+        city['lat'] = float(city['lat'])
+        city['long'] = float(city['long'])
+        city['UsagePerHour'] = int(city['UsagePerHour'])
+
+    for server in servers:
+        server['lat'] = float(server['lat'])
+        server['long'] = float(server['long'])
+        server['CPU_Health'] = float(server['CPU_Health'])
+        server['Threshold'] = float(server['Threshold'])
+        server['Capacity'] = float(server.get('Capacity', default_capacity))
+
+    return cities, servers
@@ -0,0 +1,197 @@
+import copy
+import math
+import random
+import time
+
+import numpy as np
+
+from aco.aco_runner import run_aco
+from config import ALPHA, BETA, GAMMA, EVAPORATION_RATE, NUM_ANTS, Q0
+
+class DemandSimulator:
+    def __init__(self, cities, servers, seed=None, peak_hour=21, base_level=0.15,
+                 burst_prob=0.05, burst_factor=3.0, burst_duration=2,
+                 failure_prob=0.01, repair_ticks=3):
+        """
+        Steps per-city demand and server availability through hourly ticks.
+
+        Demand follows a diurnal curve in each city's local solar time
+        (longitude / 15 hours from UTC), scaled by the city's base
+        'UsagePerHour'. Random bursts multiply a single city's demand for a few
+        ticks, and running servers fail at random and come back after a fixed
+        repair time.
+
+        Args:
+            cities: List of typed city dictionaries (base demand in 'UsagePerHour')
+            servers: List of typed server dictionaries
+            seed: Seed for the simulator's own random generator
+            peak_hour: Local hour of peak demand
+            base_level: Demand at the trough as a fraction of the peak
+            burst_prob: Probability per tick that a burst starts in some city
+            burst_factor: Demand multiplier applied during a burst
+            burst_duration: Length of a burst in ticks
+            failure_prob: Probability per tick that a given running server fails
+            repair_ticks: Ticks a failed server stays down
+        """
+        self.cities = cities
+        self.servers = servers
+        self.rng = random.Random(seed)
+        self.peak_hour = peak_hour
+        self.base_level = base_level
+        self.burst_prob = burst_prob
+        self.burst_factor = burst_factor
+        self.burst_duration = burst_duration
+        self.failure_prob = failure_prob
+        self.repair_ticks = repair_ticks
+
+        self.base_usage = [city['UsagePerHour'] for city in cities]
+        self.bursts = {}    # city_idx -> ticks remaining
+        self.failures = {}  # server_idx -> ticks remaining
+
+    def diurnal_factor(self, longitude, utc_hour):
+        """Returns the demand multiplier in [base_level, 1] for a local hour."""
+        local_hour = (utc_hour + longitude / 15.0) % 24
+        phase = 2 * math.pi * (local_hour - self.peak_hour) / 24
+        return self.base_level + (1 - self.base_level) * (1 + math.cos(phase)) / 2
+
+    def step(self, utc_hour):
+        """
+        Advances the simulation by one tick.
+
+        Args:
+            utc_hour: Hour of day (UTC) for this tick
+
+        Returns:
+            cities: Copies of the city dictionaries with this tick's demand
+            servers: Copies of the server dictionaries with failed servers 'Down'
+        """
+        self.bursts = {c: t - 1 for c, t in self.bursts.items() if t > 1}
+        self.failures = {s: t - 1 for s, t in self.failures.items() if t > 1}
+
+        if self.rng.random() < self.burst_prob:
+            self.bursts[self.rng.randrange(len(self.cities))] = self.burst_duration
+
+        for server_idx in range(len(self.servers)):
+            if server_idx not in self.failures and self.rng.random() < self.failure_prob:
+                self.failures[server_idx] = self.repair_ticks
+
+        cities = []
+        for city_idx, city in enumerate(self.cities):
+            usage = self.base_usage[city_idx] * self.diurnal_factor(city['long'], utc_hour)
+            if city_idx in self.bursts:
+                usage *= self.burst_factor
+            cities.append(dict(city, UsagePerHour=max(1, int(usage))))
+
+        servers = copy.deepcopy(self.servers)
+        for server_idx in self.failures:
+            servers[server_idx]['Status'] = 'Down'
+
+        return cities, servers
+
+def run_simulation(cities, servers, days=1, time_budget=1.0, slo_seconds=None, seed=None,
+                   alpha=ALPHA, beta=BETA, gamma=GAMMA, evaporation=EVAPORATION_RATE,
+                   num_ants=NUM_ANTS, q0=Q0, max_iterations=1000, **simulator_kwargs):
+    """
+    Runs the solver as a rolling controller over 24 x `days` hourly ticks.
+
+    Each tick re-optimizes under `time_budget` seconds, warm-started from the
+    previous tick's pheromones and (if none of its servers failed) its
+    assignment.
+
+    Args:
+        cities: List of typed city dictionaries
+        servers: List of typed server dictionaries
+        days: Number of simulated days
+        time_budget: Solver wall-clock budget per tick in seconds
+        slo_seconds: Per-tick solve latency objective (defaults to time_budget)
+        seed: Seed for both the simulator and the solver
+        max_iterations: Iteration cap per tick (the time budget usually binds first)
+        **simulator_kwargs: Passed through to DemandSimulator
+
+    Returns:
+        List of per-tick records with solve latency, cost and churn
+    """
+    if slo_seconds is None:
+        slo_seconds = time_budget
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    simulator = DemandSimulator(cities, servers, seed=seed, **simulator_kwargs)
+    previous_assignment = None
+    pheromones = None
+    records = []
+
+    for tick in range(24 * days):
+        utc_hour = tick % 24
+        tick_cities, tick_servers = simulator.step(utc_hour)
+        failed = set(simulator.failures)
+
+        incumbent = previous_assignment
+        if incumbent is not None and failed.intersection(incumbent):
+            incumbent = None
+
+        start = time.perf_counter()
+        result = run_aco(
+            tick_cities, tick_servers,
+            alpha=alpha, beta=beta, gamma=gamma,
+            iterations=max_iterations, num_ants=num_ants,
+            evaporation=evaporation, q0=q0,
+            time_budget=time_budget,
+            initial_assignment=incumbent,
+            pheromones=pheromones,
+            verbose=False
+        )
+        latency = time.perf_counter() - start
+
+        assignment = result['best_assignment']
+        churn = 0
+        if previous_assignment is not None:
+            churn = sum(1 for old, new in zip(previous_assignment, assignment) if old != new)
+
+        records.append({
+            'tick': tick,
+            'day': tick // 24,
+            'utc_hour': utc_hour,
+            'total_demand': sum(city['UsagePerHour'] for city in tick_cities),
+            'failed_servers': sorted(servers[i]['CDN_ID'] for i in failed),
+            'bursting_cities': sorted(cities[i]['City'] for i in simulator.bursts),
+            'solve_latency': latency,
+            'slo_met': latency <= slo_seconds,
+            'iterations': result['iterations_run'],
+            'cost': float(result['best_cost']),
+            'churn': churn,
+        })
+
+        previous_assignment = assignment
+        pheromones = result['pheromones']
+
+    return records
+
+def summarize_simulation(records):
+    """
+    Aggregates per-tick records into latency percentiles, SLO misses and churn.
+    """
+    latencies = np.array([r['solve_latency'] for r in records])
+    churn = np.array([r['churn'] for r in records])
+    return {
+        'ticks': len(records),
+        'latency_p50': float(np.percentile(latencies, 50)),
+        'latency_p95': float(np.percentile(latencies, 95)),
+        'latency_max': float(latencies.max()),
+        'slo_misses': sum(1 for r in records if not r['slo_met']),
+        'mean_cost': float(np.mean([r['cost'] for r in records])),
+        'mean_churn': float(churn.mean()),
+        'max_churn': int(churn.max()),
+    }
+
+if __name__ == '__main__':
+    from utils.loader import load_csv, prepare_instance
+
+    cities, servers = prepare_instance(load_csv('data/cities.csv'), load_csv('data/edge_servers.csv'))
+    records = run_simulation(cities, servers, days=1, time_budget=0.5, seed=0)
+    for record in records:
+        print(f"[TICK] {record['tick']:3d} demand={record['total_demand']:7d} "
+              f"latency={record['solve_latency']:.3f}s cost={record['cost']:.2f} "
+              f"churn={record['churn']} failed={record['failed_servers']}")
+    print(f"[INFO] Summary: {summarize_simulation(records)}")